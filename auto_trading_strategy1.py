@@ -9,17 +9,35 @@
 
 import os
 import json
+import atexit
+import functools
+import queue
 import time
 import sqlite3
 import threading
 import logging
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from enum import Enum
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Deque, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
+from types import MappingProxyType
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # =============================
 # 로깅 설정
@@ -65,6 +83,65 @@ def send_ntfy_notification(title: str, message: str, priority: str = "default",
         logger.error(f"[NTFY] 알림 전송 오류: {e}")
 
 
+# =============================
+# 이벤트 로그 파일 (append-only) 직렬화
+# =============================
+DB_FLUSH_INTERVAL_SEC = 0.5   # 로그 파일/거래 버퍼 -> SQLite 반영 주기 (초)
+TRADE_FLUSH_BATCH_SIZE = 16   # 거래 버퍼가 이 크기에 도달하면 즉시 반영
+_LOG_FILE_EXT = ".mpk" if msgpack is not None else ".jlog"
+_LOG_INSERT_SQL = """
+    INSERT INTO auto_trading_logs 
+    (timestamp, date, level, phase, code, event, message, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_LOG_OFFSET_UPSERT_SQL = """
+    INSERT INTO auto_trading_log_offsets (path, offset) VALUES (?, ?)
+    ON CONFLICT(path) DO UPDATE SET offset = excluded.offset
+"""
+
+
+def _encode_log_row(row: tuple) -> bytes:
+    """로그 row를 프레임 바이트로 직렬화 (msgpack 미설치 시 JSON)"""
+    if msgpack is not None:
+        return msgpack.packb(row, use_bin_type=True)
+    return json.dumps(row, ensure_ascii=False).encode('utf-8')
+
+
+def _decode_log_row(frame: bytes) -> list:
+    """프레임 바이트를 로그 row로 역직렬화"""
+    if msgpack is not None:
+        return msgpack.unpackb(frame, raw=False)
+    return json.loads(frame.decode('utf-8'))
+
+
+# =============================
+# 상태 파일 직렬화
+# =============================
+# 상태 파일 포맷: 'json'(기본) 또는 'msgpack'(msgpack 설치 시, 파일 크기 절감)
+STATE_FILE_FORMAT = os.getenv("AUTO_TRADING_STATE_FORMAT", "json").lower()
+if STATE_FILE_FORMAT == "msgpack" and msgpack is None:
+    STATE_FILE_FORMAT = "json"
+
+
+def _dump_state(data: dict) -> bytes:
+    """상태 dict 직렬화 (msgpack > orjson > json 순으로 사용 가능한 것 선택)"""
+    if STATE_FILE_FORMAT == "msgpack":
+        return msgpack.packb(data, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                            | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _parse_state(raw: bytes) -> dict:
+    """상태 파일 바이트 역직렬화"""
+    if STATE_FILE_FORMAT == "msgpack":
+        return msgpack.unpackb(raw, raw=False)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
 # =============================
 # 휴장일 체크 유틸리티
 # =============================
@@ -160,6 +237,48 @@ class StrategyConfig:
     ORDER_TIMEOUT_SEC = 5        # 주문 타임아웃 (초)
     ORDER_RETRY_COUNT = 3        # 주문 재시도 횟수
     ORDER_RETRY_DELAY = 0.5      # 재시도 딜레이 (초)
+    POLL_MAX_WORKERS = 16        # 종목별 시세/체결 조회 동시 실행 수
+    STATE_SAVE_INTERVAL_SEC = 30 # 변경이 없어도 상태 파일을 저장하는 주기 (초)
+
+
+# 실전투자 TR ID 목록 (매수/매도/잔고/체결조회/취소)
+_TR_IDS_REAL = ("TTTC0802U", "TTTC0801U", "TTTC8434R", "TTTC8001R", "TTTC0803U")
+
+# 호가 단위 테이블: 가격이 _TICK_THRESHOLDS[i] 미만이면 _TICK_SIZES[i]
+_TICK_THRESHOLDS = (1000, 5000, 10000, 50000, 100000, 500000)
+_TICK_SIZES = (1, 5, 10, 50, 100, 500, 1000)
+
+# 청산 사유 표시 텍스트 (주문 실행 알림용 / 체결 완료 알림용 템플릿)
+_REASON_TEXT = MappingProxyType({
+    'TP': '익절',
+    'SL': '손절',
+    'EOD': '장마감 청산',
+    'MANUAL': '수동 청산'
+})
+_FILLED_REASON_TEXT = MappingProxyType({
+    'TP': '익절',
+    'SL': '손절',
+    'EOD': '장마감 청산 ({pnl_type})',
+    'MANUAL': '수동 청산 ({pnl_type})'
+})
+
+# 관심종목(멀티종목) 시세조회 1회 최대 종목 수
+_MULTI_QUOTE_MAX = 30
+
+# 현재가 조회(FHKST01010100) 응답 필드 매핑: (결과 키, KIS 응답 필드)
+_PRICE_INT_FIELDS = (
+    ('current_price', 'stck_prpr'),
+    ('open_price', 'stck_oprc'),
+    ('high_price', 'stck_hgpr'),
+    ('low_price', 'stck_lwpr'),
+    ('prev_close', 'stck_sdpr'),
+    ('volume', 'acml_vol'),
+    ('ask_price', 'askp1'),
+    ('bid_price', 'bidp1'),
+)
+_PRICE_FLOAT_FIELDS = (
+    ('change_rate', 'prdy_ctrt'),
+)
 
 
 # =============================
@@ -190,7 +309,7 @@ class StrategyPhase(Enum):
 # =============================
 # 데이터 클래스 정의
 # =============================
-@dataclass
+@dataclass(slots=True)
 class UniverseStock:
     """유니버스 종목 정보"""
     code: str
@@ -202,7 +321,7 @@ class UniverseStock:
     added_date: str             # 유니버스 편입일
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """포지션 (보유/감시 종목) 정보"""
     code: str
@@ -288,7 +407,7 @@ class Position:
         return pos
 
 
-@dataclass
+@dataclass(slots=True)
 class StrategyState:
     """전략 전체 상태"""
     is_running: bool = False
@@ -312,11 +431,18 @@ class StrategyState:
     winning_trades: int = 0
     losing_trades: int = 0
     
-    # 로그
-    logs: List[dict] = field(default_factory=list)
+    # 로그 (최근 500개만 유지, maxlen으로 자동 truncation)
+    logs: Deque[dict] = field(default_factory=lambda: deque(maxlen=500))
+    
+    # 마지막 업데이트 (epoch 초, ISO 문자열 변환은 조회 시점에만 수행)
+    last_update_ts: float = 0.0
     
-    # 마지막 업데이트
-    last_update: str = ""
+    @property
+    def last_update(self) -> str:
+        """마지막 업데이트 시각 (ISO 형식)"""
+        if not self.last_update_ts:
+            return ""
+        return datetime.fromtimestamp(self.last_update_ts).isoformat()
     
     def to_dict(self) -> dict:
         """딕셔너리 변환"""
@@ -329,11 +455,11 @@ class StrategyState:
             'daily_pnl': self.daily_pnl,
             'daily_pnl_rate': self.daily_pnl_rate,
             'universe': [asdict(u) for u in self.universe],
-            'positions': {k: v.to_dict() for k, v in self.positions.items()},
+            'positions': {k: v.to_dict() for k, v in list(self.positions.items())},
             'total_trades': self.total_trades,
             'winning_trades': self.winning_trades,
             'losing_trades': self.losing_trades,
-            'logs': self.logs[-100:],  # 최근 100개만
+            'logs': list(self.logs)[-100:],  # 최근 100개만
             'last_update': self.last_update
         }
 
@@ -350,7 +476,34 @@ class AutoTradingEngine:
         self.config = StrategyConfig()
         self._lock = threading.Lock()
         self._running = False
+        self._wake = threading.Event()  # 루프 대기 중단용 (stop/wake)
+        
+        # 상태 파일 저장 제어: 변경이 있거나 STATE_SAVE_INTERVAL_SEC 경과 시에만 저장
+        self._state_dirty = False
+        self._last_state_save = 0.0
+        
+        # 엔진 전용 SQLite 연결 (지연 생성, _db_lock으로 직렬화)
+        self._db_lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        # 거래 내역 쓰기 버퍼 (일괄 트랜잭션으로 반영)
+        self._trade_write_buf: Deque[tuple] = deque()
         self._thread: Optional[threading.Thread] = None
+        self._io_pool: Optional[ThreadPoolExecutor] = None  # 종목별 API 호출용 스레드 풀
+        self._positions_lock = threading.RLock()  # state.positions 추가/스냅샷 보호
+        
+        # 계좌 잔고 캐시: (조회 시각, 잔고 dict)
+        self._balance_cache: Optional[Tuple[float, dict]] = None
+        
+        # ntfy 알림 큐 (전송은 전용 스레드에서 수행하여 매매 루프를 막지 않음)
+        self._ntfy_q: queue.Queue = queue.Queue(maxsize=256)
+        self._ntfy_thread = threading.Thread(target=self._ntfy_loop, daemon=True)
+        self._ntfy_thread.start()
+        
+        # 매수 스케줄 진입 구간 캐시 (_get_buy_windows)
+        self._buy_windows: List[Tuple[str, str]] = []
+        self._buy_windows_key: Optional[tuple] = None
+        self._token_lock = threading.Lock()
         
         # 모의투자/실전투자 모드
         self.is_mock = is_mock
@@ -367,17 +520,51 @@ class AutoTradingEngine:
             self.app_secret = os.getenv("KIS_REAL_APP_SECRET", os.getenv("KIS_APP_SECRET", ""))
             self.account_no = os.getenv("KIS_REAL_ACCOUNT_NO", os.getenv("KIS_ACCOUNT_NO", ""))
         
+        # TR ID 매핑 (모의투자는 T -> V, 생성 시 한 번만 계산)
+        self._tr_map = {
+            tr_id: ('V' + tr_id[1:] if is_mock else tr_id) for tr_id in _TR_IDS_REAL
+        }
+        
         self._access_token: Optional[str] = None
         self._token_expired: float = 0
         
+        # KIS API용 keep-alive 세션 (TCP/TLS 연결 재사용)
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+        self._http.headers.update({
+            "content-type": "application/json; charset=utf-8",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret,
+            "custtype": "P"
+        })
+        
         # 상태 파일 (모의/실전 분리)
         mode_suffix = "_mock" if is_mock else "_real"
-        self.state_file = Path(f"auto_trading_state{mode_suffix}.json")
+        state_ext = ".msgpack" if STATE_FILE_FORMAT == "msgpack" else ".json"
+        self.state_file = Path(f"auto_trading_state{mode_suffix}{state_ext}")
+        
+        # 이벤트 로그: append-only 파일에 기록 후 백그라운드 스레드가 SQLite로 일괄 반영
+        self._log_path = Path(f"auto_trading_logs{mode_suffix}{_LOG_FILE_EXT}")
+        self._log_fd = os.open(
+            self._log_path,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        )
+        self._log_offset = 0
+        self._log_file_lock = threading.Lock()
+        self._log_drain_lock = threading.Lock()
         
-        # 초기화
+        # 초기화 (_init_db는 선행 조건이므로 동기 실행, 설정/상태 로드는 서로 독립적인 I/O라 병렬 실행)
         self._init_db()
-        self._load_config_from_db()  # DB에서 설정 로드
-        self._load_state()
+        self._log_offset = self._load_log_offset()  # 비정상 종료 후 재시작 시 이미 반영한 프레임은 건너뜀
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            config_future = executor.submit(self._load_config_from_db)  # DB에서 설정 로드
+            state_future = executor.submit(self._load_state)
+            config_future.result()
+            state_future.result()
+        
+        self._db_flush_thread = threading.Thread(target=self._db_flush_loop, daemon=True)
+        self._db_flush_thread.start()
+        atexit.register(self._flush_pending_writes)  # 프로세스 종료 시 남은 버퍼 반영
     
     def _load_config_from_db(self):
         """DB(auto_trading_settings)에서 전략 설정 로드"""
@@ -464,6 +651,12 @@ class AutoTradingEngine:
                 )
             """)
             
+            # 거래 내역 조회용 인덱스 (trade_date 범위 + created_at 정렬)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trades_date_created
+                ON auto_trading_trades(trade_date, created_at DESC)
+            """)
+            
             # 유니버스 히스토리 테이블
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS auto_trading_universe (
@@ -480,18 +673,45 @@ class AutoTradingEngine:
                 )
             """)
             
+            # 로그 파일 반영 위치 (로그 INSERT와 같은 트랜잭션으로 갱신하여 재시작 시 중복 반영 방지)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS auto_trading_log_offsets (
+                    path TEXT PRIMARY KEY,
+                    offset INTEGER NOT NULL
+                )
+            """)
+            
             conn.commit()
             conn.close()
             logger.info("자동매매 DB 초기화 완료")
         except Exception as e:
             logger.error(f"DB 초기화 실패: {e}")
     
+    def _get_conn(self) -> sqlite3.Connection:
+        """엔진 전용 SQLite 연결 반환 (최초 호출 시 WAL + 튜닝 pragma 적용)"""
+        if self._conn is None:
+            with self._db_lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                           isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.execute("PRAGMA busy_timeout=5000")
+                    conn.execute("PRAGMA temp_store=MEMORY")
+                    conn.row_factory = sqlite3.Row
+                    self._conn = conn
+        return self._conn
+    
     def _save_state(self):
-        """상태 저장"""
+        """상태 저장 (임시 파일에 쓴 뒤 os.replace로 교체하여 저장 중 크래시에도 파일 보존)"""
         try:
             with self._lock:
-                with open(self.state_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.state.to_dict(), f, ensure_ascii=False, indent=2)
+                self._state_dirty = False
+                payload = _dump_state(self.state.to_dict())
+                tmp_file = self.state_file.with_name(self.state_file.name + '.tmp')
+                tmp_file.write_bytes(payload)
+                os.replace(tmp_file, self.state_file)
+                self._last_state_save = time.time()
         except Exception as e:
             logger.error(f"상태 저장 실패: {e}")
     
@@ -499,8 +719,7 @@ class AutoTradingEngine:
         """상태 로드"""
         try:
             if self.state_file.exists():
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = _parse_state(self.state_file.read_bytes())
                     
                 # 오늘 날짜 확인
                 today = datetime.now().strftime('%Y-%m-%d')
@@ -551,35 +770,25 @@ class AutoTradingEngine:
             'message': message,
             'data': data
         }
+        row = (
+            timestamp,
+            self.state.today,
+            level,
+            self.state.phase.value,
+            code,
+            event,
+            message,
+            json.dumps(data) if data else None
+        )
         
-        # 메모리 로그
+        # 메모리 로그 (락은 append 한 번만 잡고, DB 작업은 락 밖에서 수행)
         with self._lock:
             self.state.logs.append(log_entry)
-            if len(self.state.logs) > 500:
-                self.state.logs = self.state.logs[-500:]
         
-        # DB 로그
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO auto_trading_logs 
-                (timestamp, date, level, phase, code, event, message, data)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                timestamp,
-                self.state.today,
-                level,
-                self.state.phase.value,
-                code,
-                event,
-                message,
-                json.dumps(data) if data else None
-            ))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"로그 DB 저장 실패: {e}")
+        # 파일 로그 (SQLite 반영은 _db_flush_loop에서 비동기로 일괄 수행, ERROR는 즉시 반영)
+        self._append_log_frame(row)
+        if level == 'ERROR':
+            self._drain_log_file()
         
         # 콘솔 로그
         log_msg = f"[{event}] {code}: {message}" if code else f"[{event}] {message}"
@@ -590,14 +799,118 @@ class AutoTradingEngine:
         else:
             logger.info(log_msg)
     
+    def _append_log_frame(self, row: tuple):
+        """로그 1건을 append-only 로그 파일에 기록 (4바이트 길이 prefix + 프레임, write 1회)"""
+        try:
+            frame = _encode_log_row(row)
+            with self._log_file_lock:
+                os.write(self._log_fd, len(frame).to_bytes(4, 'big') + frame)
+        except Exception as e:
+            logger.error(f"로그 파일 기록 실패: {e}")
+    
+    def _drain_log_file(self):
+        """로그 파일의 신규 프레임을 auto_trading_logs 테이블에 일괄 반영"""
+        with self._log_drain_lock:
+            try:
+                with open(self._log_path, 'rb') as f:
+                    f.seek(self._log_offset)
+                    buf = f.read()
+                
+                rows = []
+                pos = 0
+                while pos + 4 <= len(buf):
+                    size = int.from_bytes(buf[pos:pos + 4], 'big')
+                    if pos + 4 + size > len(buf):
+                        break  # 기록 중인 프레임은 다음 주기에 반영
+                    rows.append(_decode_log_row(buf[pos + 4:pos + 4 + size]))
+                    pos += 4 + size
+                
+                if rows:
+                    with self._db_lock:
+                        conn = self._get_conn()
+                        conn.execute("BEGIN")
+                        try:
+                            conn.executemany(_LOG_INSERT_SQL, rows)
+                            conn.execute(_LOG_OFFSET_UPSERT_SQL, (self._log_path.name, self._log_offset + pos))
+                            conn.execute("COMMIT")
+                        except Exception:
+                            conn.execute("ROLLBACK")
+                            raise
+                self._log_offset += pos
+                
+                # 모두 반영되었으면 파일을 비움 (비운 직후 종료되어 저장된 위치가 남아도
+                # 재시작 시 파일 크기보다 크므로 _load_log_offset에서 0으로 처리됨)
+                with self._log_file_lock:
+                    if self._log_offset and os.fstat(self._log_fd).st_size == self._log_offset:
+                        os.ftruncate(self._log_fd, 0)
+                        self._log_offset = 0
+                        with self._db_lock:
+                            self._get_conn().execute(_LOG_OFFSET_UPSERT_SQL, (self._log_path.name, 0))
+            except Exception as e:
+                logger.error(f"로그 DB 저장 실패: {e}")
+    
+    def _load_log_offset(self) -> int:
+        """로그 파일에서 이미 SQLite에 반영된 위치 (저장된 값이 없거나 파일이 비워졌으면 0)"""
+        try:
+            with self._db_lock:
+                row = self._get_conn().execute(
+                    "SELECT offset FROM auto_trading_log_offsets WHERE path = ?",
+                    (self._log_path.name,)
+                ).fetchone()
+            offset = row[0] if row else 0
+            if offset > os.fstat(self._log_fd).st_size:
+                return 0
+            return offset
+        except Exception as e:
+            logger.error(f"로그 반영 위치 로드 실패: {e}")
+            return 0
+    
+    def _flush_pending_writes(self):
+        """버퍼링된 거래 내역/로그를 SQLite에 즉시 반영"""
+        self._flush_trades()
+        self._drain_log_file()
+    
+    def _db_flush_loop(self):
+        """로그 파일/거래 버퍼 -> SQLite 반영 백그라운드 루프"""
+        while True:
+            time.sleep(DB_FLUSH_INTERVAL_SEC)
+            self._flush_pending_writes()
+    
+    def _notify(self, title: str, message: str, priority: str = "default", tags: List[str] = None):
+        """ntfy 알림 전송 요청 (큐가 가득 차면 버림)"""
+        try:
+            self._ntfy_q.put_nowait({
+                'title': title,
+                'message': message,
+                'priority': priority,
+                'tags': tags
+            })
+        except queue.Full:
+            logger.warning(f"[NTFY] 알림 큐 포화로 알림 누락: {title}")
+    
+    def _ntfy_loop(self):
+        """ntfy 알림 전송 백그라운드 루프"""
+        while True:
+            kwargs = self._ntfy_q.get()
+            send_ntfy_notification(**kwargs)
+    
     # =============================
     # KIS API 연동
     # =============================
     
     def _get_access_token(self) -> Optional[str]:
         """KIS 액세스 토큰 조회/발급"""
+        # 캐시된 토큰이 유효하면 반환
+        if self._access_token and time.time() < self._token_expired - 600:
+            return self._access_token
+        
+        # 여러 스레드가 동시에 토큰을 발급받지 않도록 직렬화
+        with self._token_lock:
+            return self._load_or_issue_token()
+    
+    def _load_or_issue_token(self) -> Optional[str]:
+        """파일 캐시 토큰 로드, 없거나 만료 시 신규 발급"""
         try:
-            # 캐시된 토큰이 유효하면 반환
             if self._access_token and time.time() < self._token_expired - 600:
                 return self._access_token
             
@@ -614,7 +927,7 @@ class AutoTradingEngine:
             
             # 새 토큰 발급
             url = f"{self.kis_base_url}/oauth2/tokenP"
-            response = requests.post(url, json={
+            response = self._http.post(url, json={
                 "grant_type": "client_credentials",
                 "appkey": self.app_key,
                 "appsecret": self.app_secret
@@ -650,20 +963,17 @@ class AutoTradingEngine:
             return {'error': '토큰 없음'}
         
         url = f"{self.kis_base_url}{endpoint}"
+        # 공통 헤더(content-type/appkey/appsecret/custtype)는 세션에 설정되어 있음
         headers = {
-            "content-type": "application/json; charset=utf-8",
             "authorization": f"Bearer {token}",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret,
-            "tr_id": tr_id,
-            "custtype": "P"
+            "tr_id": tr_id
         }
         
         try:
             if method == "POST":
-                response = requests.post(url, headers=headers, json=body, timeout=10)
+                response = self._http.post(url, headers=headers, json=body, timeout=10)
             else:
-                response = requests.get(url, headers=headers, params=params, timeout=10)
+                response = self._http.get(url, headers=headers, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -693,19 +1003,47 @@ class AutoTradingEngine:
         
         output = result.get('output', {})
         if output:
-            return {
-                'current_price': int(output.get('stck_prpr', 0) or 0),
-                'open_price': int(output.get('stck_oprc', 0) or 0),
-                'high_price': int(output.get('stck_hgpr', 0) or 0),
-                'low_price': int(output.get('stck_lwpr', 0) or 0),
-                'prev_close': int(output.get('stck_sdpr', 0) or 0),
-                'change_rate': float(output.get('prdy_ctrt', 0) or 0),
-                'volume': int(output.get('acml_vol', 0) or 0),
-                'ask_price': int(output.get('askp1', 0) or 0),
-                'bid_price': int(output.get('bidp1', 0) or 0)
-            }
+            get = output.get
+            int_cast = int
+            float_cast = float
+            price = {}
+            for key, field_name in _PRICE_INT_FIELDS:
+                value = get(field_name)
+                price[key] = int_cast(value) if value else 0
+            for key, field_name in _PRICE_FLOAT_FIELDS:
+                value = get(field_name)
+                price[key] = float_cast(value) if value else 0.0
+            return price
         return {}
     
+    def _get_current_prices(self, codes: List[str]) -> Dict[str, int]:
+        """복수 종목 현재가 일괄 조회 (관심종목 멀티 시세, 호출당 최대 30종목)
+        
+        모의투자는 해당 API를 지원하지 않으므로 빈 dict 반환 (호출 측에서 종목별 조회로 대체)
+        Returns: {종목코드: 현재가}
+        """
+        if self.is_mock or not codes:
+            return {}
+        
+        prices = {}
+        for i in range(0, len(codes), _MULTI_QUOTE_MAX):
+            params = {}
+            for n, code in enumerate(codes[i:i + _MULTI_QUOTE_MAX], start=1):
+                params[f"FID_COND_MRKT_DIV_CODE_{n}"] = "J"
+                params[f"FID_INPUT_ISCD_{n}"] = code.zfill(6)
+            
+            result = self._call_kis_api(
+                "/uapi/domestic-stock/v1/quotations/intstock-multprice",
+                params=params,
+                tr_id="FHKST11300006"
+            )
+            for item in result.get('output') or []:
+                code = item.get('inter_shrn_iscd', '')
+                price = item.get('inter2_prpr')
+                if code and price:
+                    prices[code] = int(price)
+        return prices
+    
     def _get_market_cap(self, code: str) -> float:
         """시가총액 조회 (억원 단위)
         
@@ -782,13 +1120,37 @@ class AutoTradingEngine:
             'available': int(output2.get('nass_amt', 0) or 0)
         }
     
+    def _get_cached_balance(self, ttl: float = 60) -> dict:
+        """계좌 잔고 조회 (ttl초 이내면 캐시 사용)"""
+        now = time.time()
+        cached = self._balance_cache
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+        
+        balance = self._get_account_balance()
+        if 'error' not in balance:
+            self._balance_cache = (now, balance)
+        return balance
+    
+    def _invalidate_balance_cache(self):
+        """체결 등으로 잔고가 바뀌었을 때 다음 조회가 API를 다시 호출하도록 캐시 무효화"""
+        self._balance_cache = None
+    
+    def _update_balance(self) -> dict:
+        """자산 정보 갱신 (캐시된 잔고여도 매번 상태에 반영)
+        Returns: 잔고 dict (조회 실패 시 'error' 포함)
+        """
+        balance = self._get_cached_balance()
+        if 'error' not in balance:
+            self.state.total_asset = balance.get('total_eval', 0)  # 총평가금액 (예수금 포함)
+            self.state.available_cash = balance.get('available', 0)
+        return balance
+    
     def _get_tr_id(self, base_tr_id: str) -> str:
         """모의/실전투자에 맞는 TR ID 반환
         모의투자: T -> V로 변경 (예: TTTC0802U -> VTTC0802U)
         """
-        if self.is_mock and base_tr_id.startswith('T'):
-            return 'V' + base_tr_id[1:]
-        return base_tr_id
+        return self._tr_map.get(base_tr_id, base_tr_id)
     
     def _place_order(self, code: str, quantity: int, order_type: str, 
                      price: int = 0) -> dict:
@@ -837,10 +1199,10 @@ class AutoTradingEngine:
             'order_type': order_type
         }
     
-    def _get_order_status(self, order_no: str) -> dict:
-        """주문 체결 상태 조회"""
+    def _inquire_daily_orders(self, order_no: str = "") -> Optional[list]:
+        """당일 주문체결 조회 (order_no가 비어 있으면 당일 전체 주문, 1페이지)"""
         if not self.account_no:
-            return {'error': '계좌번호 미설정'}
+            return None
         
         parts = self.account_no.split('-')
         today = datetime.now().strftime('%Y%m%d')
@@ -865,22 +1227,44 @@ class AutoTradingEngine:
             },
             tr_id=self._get_tr_id("TTTC8001R")
         )
+        return result.get('output1', [])
+    
+    @staticmethod
+    def _parse_order_status(item: dict) -> dict:
+        """주문체결 조회 응답 1건을 상태 dict로 변환"""
+        remain_qty = int(item.get('rmn_qty', 0) or 0)
+        return {
+            'order_no': item.get('odno', ''),
+            'code': item.get('pdno', ''),
+            'order_qty': int(item.get('ord_qty', 0) or 0),
+            'exec_qty': int(item.get('tot_ccld_qty', 0) or 0),
+            'exec_price': float(item.get('avg_prvs', 0) or 0),
+            'remain_qty': remain_qty,
+            'status': 'FILLED' if remain_qty == 0 else 'PARTIAL'
+        }
+    
+    def _get_order_status(self, order_no: str) -> dict:
+        """주문 체결 상태 조회"""
+        if not self.account_no:
+            return {'error': '계좌번호 미설정'}
         
-        output1 = result.get('output1', [])
-        for item in output1:
+        for item in self._inquire_daily_orders(order_no) or []:
             if item.get('odno') == order_no:
-                return {
-                    'order_no': order_no,
-                    'code': item.get('pdno', ''),
-                    'order_qty': int(item.get('ord_qty', 0) or 0),
-                    'exec_qty': int(item.get('tot_ccld_qty', 0) or 0),
-                    'exec_price': float(item.get('avg_prvs', 0) or 0),
-                    'remain_qty': int(item.get('rmn_qty', 0) or 0),
-                    'status': 'FILLED' if int(item.get('rmn_qty', 0) or 0) == 0 else 'PARTIAL'
-                }
+                return self._parse_order_status(item)
         
         return {'error': '주문 조회 실패'}
     
+    def _get_all_order_statuses(self) -> Dict[str, dict]:
+        """당일 주문 체결 상태 일괄 조회 (1회 호출)
+        Returns: {주문번호: 상태 dict} - 응답에 없는 주문은 _get_order_status로 개별 조회
+        """
+        statuses = {}
+        for item in self._inquire_daily_orders() or []:
+            order_no = item.get('odno')
+            if order_no:
+                statuses[order_no] = self._parse_order_status(item)
+        return statuses
+    
     def _cancel_order(self, order_no: str, code: str, quantity: int) -> dict:
         """미체결 주문 취소
         
@@ -967,6 +1351,36 @@ class AutoTradingEngine:
             self._log_event('ERROR', 'UNIVERSE_ERROR', f'유니버스 로드 실패: {e}')
         
         return universe
+    
+    def _save_universe_to_db(self, universe: List[UniverseStock], result: str = None):
+        """유니버스 히스토리(auto_trading_universe) 저장
+        
+        UNIQUE(date, code) 충돌 시 단일 UPSERT 문으로 갱신하고, 전체를 하나의 트랜잭션으로 기록
+        """
+        if not universe:
+            return
+        
+        rows = [
+            (u.added_date or self.state.today, u.code, u.name,
+             u.prev_close, u.change_rate, u.market_cap, result)
+            for u in universe
+        ]
+        try:
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                conn.executemany("""
+                    INSERT INTO auto_trading_universe
+                    (date, code, name, prev_close, change_rate, market_cap, result)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(date, code) DO UPDATE SET
+                        prev_close = excluded.prev_close,
+                        change_rate = excluded.change_rate,
+                        market_cap = excluded.market_cap,
+                        result = COALESCE(excluded.result, auto_trading_universe.result)
+                """, rows)
+            conn.close()
+        except Exception as e:
+            logger.error(f"유니버스 히스토리 저장 실패: {e}")
             
     # =============================
     # 시그널 엔진 (매매전략 설정 기반)
@@ -1025,6 +1439,7 @@ class AutoTradingEngine:
     
     def execute_entry(self, position: Position) -> bool:
         """진입 주문 실행 (현재가 + 슬리피지 지정가 주문)"""
+        self._state_dirty = True
         try:
             # 투자 금액 계산 (1/N 방식: 총자산 / 최대 포지션 수)
             position_amount = self.state.total_asset / self.config.MAX_POSITIONS
@@ -1075,7 +1490,7 @@ class AutoTradingEngine:
                 return False
             
             # 최대 포지션 수 체크
-            active_positions = sum(1 for p in self.state.positions.values() 
+            active_positions = sum(1 for p in self._snapshot_positions()
                                   if p.state == PositionState.ENTERED)
             if active_positions >= self.config.MAX_POSITIONS:
                 self._log_event('WARNING', 'ENTRY_SKIP', '최대 포지션 수 도달',
@@ -1115,7 +1530,7 @@ class AutoTradingEngine:
                           data={'order_no': position.order_id, 'qty': quantity, 'price': order_price})
             
             # ntfy 알림: 매수 주문 실행
-            send_ntfy_notification(
+            self._notify(
                 title="🚀 매수 주문 실행",
                 message=f"[{position.name}] {quantity}주 @ {order_price:,}원 (지정가)",
                 priority="default",
@@ -1132,6 +1547,7 @@ class AutoTradingEngine:
     
     def execute_exit(self, position: Position, reason: str) -> bool:
         """청산 주문 실행"""
+        self._state_dirty = True
         try:
             if position.quantity <= 0:
                 self._log_event('WARNING', 'EXIT_SKIP', '청산할 수량 없음',
@@ -1158,14 +1574,9 @@ class AutoTradingEngine:
                           data={'order_no': position.order_id, 'qty': position.quantity, 'reason': reason})
             
             # ntfy 알림: 매도 주문 실행
-            reason_text = {
-                'TP': '익절',
-                'SL': '손절',
-                'EOD': '장마감 청산',
-                'MANUAL': '수동 청산'
-            }.get(reason, reason)
-            
-            send_ntfy_notification(
+            reason_text = _REASON_TEXT.get(reason, reason)
+            
+            self._notify(
                 title=f"📢 {reason_text} 주문 실행",
                 message=f"[{position.name}] {position.quantity}주 (시장가)",
                 priority="default",
@@ -1178,8 +1589,10 @@ class AutoTradingEngine:
                           code=position.code)
             return False
     
-    def confirm_order(self, position: Position) -> bool:
-        """주문 체결 확인"""
+    def confirm_order(self, position: Position, order_statuses: Dict[str, dict] = None) -> bool:
+        """주문 체결 확인
+        order_statuses: _get_all_order_statuses 결과 (있으면 개별 API 호출 없이 사용)
+        """
         try:
             if not position.order_id:
                 # 주문번호가 없는데 ENTRY_PENDING 이라면 비정상 상태이므로 WATCHING으로 복구
@@ -1187,9 +1600,14 @@ class AutoTradingEngine:
                     self._log_event('WARNING', 'ORDER_ID_MISSING', 
                                   '주문번호 누락으로 인해 WATCHING 상태로 복구합니다.', code=position.code)
                     position.state = PositionState.WATCHING
+                    self._state_dirty = True
                 return False
             
-            status = self._get_order_status(position.order_id)
+            status = None
+            if order_statuses:
+                status = order_statuses.get(position.order_id)
+            if status is None:
+                status = self._get_order_status(position.order_id)
             
             if 'error' in status:
                 return False
@@ -1200,6 +1618,8 @@ class AutoTradingEngine:
             
             if position.state == PositionState.ENTRY_PENDING:
                 if exec_qty > 0:
+                    self._invalidate_balance_cache()
+                    self._state_dirty = True
                     position.quantity = exec_qty
                     position.entry_price = exec_price
                     position.entry_time = datetime.now().isoformat()
@@ -1212,7 +1632,7 @@ class AutoTradingEngine:
                                       data={'qty': exec_qty, 'price': exec_price})
                         
                         # ntfy 알림: 매수 완료
-                        send_ntfy_notification(
+                        self._notify(
                             title="✅ 매수 체결 완료",
                             message=f"[{position.name}] {exec_qty}주 @ {exec_price:,}원",
                             priority="high",
@@ -1227,6 +1647,8 @@ class AutoTradingEngine:
             elif position.state == PositionState.EXIT_PENDING:
                 if remain_qty == 0:
                     # 청산 완료
+                    self._invalidate_balance_cache()
+                    self._state_dirty = True
                     pnl = (exec_price - position.entry_price) * exec_qty
                     pnl_rate = (exec_price - position.entry_price) / position.entry_price * 100 if position.entry_price > 0 else 0
                     
@@ -1235,14 +1657,15 @@ class AutoTradingEngine:
                     position.unrealized_pnl = pnl
                     position.unrealized_pnl_rate = pnl_rate
                     
-                    # 통계 업데이트
-                    self.state.total_trades += 1
-                    if pnl >= 0:
-                        self.state.winning_trades += 1
-                    else:
-                        self.state.losing_trades += 1
-                    
-                    self.state.daily_pnl += pnl
+                    # 통계 업데이트 (종목별 처리가 병렬로 실행되므로 락으로 보호)
+                    with self._lock:
+                        self.state.total_trades += 1
+                        if pnl >= 0:
+                            self.state.winning_trades += 1
+                        else:
+                            self.state.losing_trades += 1
+                        
+                        self.state.daily_pnl += pnl
                     
                     # DB 기록
                     self._record_trade(position, 'sell', exec_qty, exec_price, pnl, pnl_rate)
@@ -1255,14 +1678,11 @@ class AutoTradingEngine:
                     # ntfy 알림: 청산 완료 (TP/SL)
                     emoji = "🎉" if pnl >= 0 else "😢"
                     pnl_type = "익절" if pnl >= 0 else "손절"
-                    reason_text = {
-                        'TP': '익절',
-                        'SL': '손절', 
-                        'EOD': f'장마감 청산 ({pnl_type})',
-                        'MANUAL': f'수동 청산 ({pnl_type})'
-                    }.get(position.exit_reason, f"{position.exit_reason} ({pnl_type})")
+                    reason_text = _FILLED_REASON_TEXT.get(
+                        position.exit_reason, "{reason} ({pnl_type})"
+                    ).format(reason=position.exit_reason, pnl_type=pnl_type)
                     
-                    send_ntfy_notification(
+                    self._notify(
                         title=f"{emoji} {reason_text} 완료",
                         message=f"[{position.name}] {exec_qty}주 @ {exec_price:,}원\n손익: {pnl:+,.0f}원 ({pnl_rate:+.2f}%)",
                         priority="high" if abs(pnl_rate) >= 5 else "default",
@@ -1278,59 +1698,77 @@ class AutoTradingEngine:
     
     def _record_trade(self, position: Position, trade_type: str, 
                       quantity: int, price: float, pnl: float, pnl_rate: float):
-        """거래 내역 DB 기록"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO auto_trading_trades 
-                (trade_date, code, name, trade_type, quantity, price, amount, exit_reason, pnl, pnl_rate)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                self.state.today,
-                position.code,
-                position.name,
-                trade_type,
-                quantity,
-                price,
-                quantity * price,
-                position.exit_reason if trade_type == 'sell' else None,
-                pnl if trade_type == 'sell' else None,
-                pnl_rate if trade_type == 'sell' else None
-            ))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"거래 기록 실패: {e}")
+        """거래 내역 DB 기록 (버퍼에 적재 후 _flush_trades에서 일괄 반영)"""
+        self._trade_write_buf.append((
+            self.state.today,
+            position.code,
+            position.name,
+            trade_type,
+            quantity,
+            price,
+            quantity * price,
+            position.exit_reason if trade_type == 'sell' else None,
+            pnl if trade_type == 'sell' else None,
+            pnl_rate if trade_type == 'sell' else None
+        ))
+        if len(self._trade_write_buf) >= TRADE_FLUSH_BATCH_SIZE:
+            self._flush_trades()
+    
+    def _flush_trades(self):
+        """버퍼링된 거래 내역을 하나의 트랜잭션으로 DB에 기록"""
+        if not self._trade_write_buf:
+            return
+        
+        with self._db_lock:
+            # popleft는 동시 append와 안전하게 병행 가능
+            buf = [self._trade_write_buf.popleft() for _ in range(len(self._trade_write_buf))]
+            try:
+                conn = self._get_conn()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany("""
+                        INSERT INTO auto_trading_trades 
+                        (trade_date, code, name, trade_type, quantity, price, amount, exit_reason, pnl, pnl_rate)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, buf)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            except Exception as e:
+                logger.error(f"거래 기록 실패: {e}")
     
     def _get_tick_size(self, price: int) -> int:
         """호가 단위 계산"""
-        if price < 1000:
-            return 1
-        elif price < 5000:
-            return 5
-        elif price < 10000:
-            return 10
-        elif price < 50000:
-            return 50
-        elif price < 100000:
-            return 100
-        elif price < 500000:
-            return 500
-        else:
-            return 1000
+        return _TICK_SIZES[bisect_right(_TICK_THRESHOLDS, price)]
     
     # =============================
     # 메인 루프
     # =============================
     
-    def _determine_phase(self) -> StrategyPhase:
+    def _get_buy_windows(self) -> List[Tuple[str, str]]:
+        """BUY_SCHEDULE별 진입 구간 ('HH:MM' 시작, 시작+3분) 목록
+        
+        스케줄이 바뀔 때만 다시 계산하고 그 외에는 캐시된 값을 반환
+        """
+        schedule = tuple(self.config.BUY_SCHEDULE)
+        if schedule != self._buy_windows_key:
+            self._buy_windows = [
+                (s, (datetime.strptime(s, '%H:%M') + timedelta(minutes=3)).strftime('%H:%M'))
+                for s in schedule
+            ]
+            self._buy_windows_key = schedule
+        return self._buy_windows
+    
+    def _determine_phase(self, now_ts: float = None) -> StrategyPhase:
         """현재 시간에 따른 전략 단계 결정 (개편된 로직)"""
-        now = datetime.now()
-        current_time = now.strftime('%H:%M')
+        if now_ts is None:
+            now_ts = time.time()
+        now = time.localtime(now_ts)
+        current_time = f"{now.tm_hour:02d}:{now.tm_min:02d}"  # strftime보다 빠른 정수 포맷
         
         # 1. 장외 시간/휴장일 체크
-        if now.weekday() >= 5 or not is_trading_day(now.date()):
+        if now.tm_wday >= 5 or not is_trading_day(date(now.tm_year, now.tm_mon, now.tm_mday)):
             return StrategyPhase.IDLE
         
         # 2. 시작 전
@@ -1348,12 +1786,8 @@ class AutoTradingEngine:
         # 5. 진입(매수) 구간 확인
         # 설정된 BUY_SCHEDULE 중 현재 시간이 포함되는지 확인 (각 시간 기준 +3분간 유지)
         is_entry_window = False
-        for scheduled_buy in self.config.BUY_SCHEDULE:
-            buy_dt = datetime.strptime(scheduled_buy, '%H:%M')
-            buy_end_dt = buy_dt + timedelta(minutes=3)
-            buy_end_time = buy_end_dt.strftime('%H:%M')
-            
-            if scheduled_buy <= current_time < buy_end_time:
+        for buy_start_time, buy_end_time in self._get_buy_windows():
+            if buy_start_time <= current_time < buy_end_time:
                 is_entry_window = True
                 break
         
@@ -1371,19 +1805,27 @@ class AutoTradingEngine:
         
         return StrategyPhase.MONITORING
     
+    def _sleep(self, seconds: float):
+        """루프 대기 (stop() 또는 wake() 호출 시 즉시 깨어남)"""
+        self._wake.wait(timeout=seconds)
+        if self._running:
+            self._wake.clear()  # 중지 요청은 루프가 빠져나갈 때까지 유지
+    
     def _run_loop(self):
         """메인 실행 루프"""
+        io_pool = self._io_pool  # 이 루프가 쓰는 풀 (루프 종료 시 정리)
         self._log_event('INFO', 'ENGINE_START', '자동매매 엔진 시작')
         
         while self._running:
             try:
                 # 단계 결정
-                new_phase = self._determine_phase()
+                new_phase = self._determine_phase(time.time())
                 
                 if new_phase != self.state.phase:
                     self._log_event('INFO', 'PHASE_CHANGE', 
                                   f'{self.state.phase.value} → {new_phase.value}')
                     self.state.phase = new_phase
+                    self._state_dirty = True
                 
                 # 단계별 처리
                 if self.state.phase == StrategyPhase.PREPARING:
@@ -1397,19 +1839,30 @@ class AutoTradingEngine:
                 elif self.state.phase == StrategyPhase.CLOSED:
                     self._phase_closed()
                 
-                # 상태 업데이트
-                self.state.last_update = datetime.now().isoformat()
-                self._save_state()
+                # 상태 업데이트 (변경이 있을 때 또는 주기적으로만 파일 저장)
+                self.state.last_update_ts = time.time()
+                if (self._state_dirty or
+                        self.state.last_update_ts - self._last_state_save >= self.config.STATE_SAVE_INTERVAL_SEC):
+                    self._save_state()
                 
                 # 루프 간격 (1초)
-                time.sleep(1)
+                self._sleep(1)
                 
             except Exception as e:
                 self._log_event('ERROR', 'LOOP_ERROR', f'루프 오류: {e}')
-                time.sleep(5)
+                self._sleep(5)
         
+        self._release_io_pool(io_pool)
         self._log_event('INFO', 'ENGINE_STOP', '자동매매 엔진 중지')
     
+    def _release_io_pool(self, pool: Optional[ThreadPoolExecutor]):
+        """I/O 스레드 풀 종료 (그 사이 start()로 새 풀이 생겼으면 새 풀은 유지)"""
+        if pool is None:
+            return
+        pool.shutdown(wait=False)
+        if self._io_pool is pool:
+            self._io_pool = None
+    
     def _phase_preparing(self):
         """준비 단계 (08:30~매수 시작 전)"""
         # 토큰 확인
@@ -1417,73 +1870,199 @@ class AutoTradingEngine:
             self._log_event('ERROR', 'PREPARE_FAIL', '토큰 발급 실패')
             return
         
-        # 계좌 잔고 확인
-        balance = self._get_account_balance()
-        if 'error' not in balance:
-            self.state.total_asset = balance.get('total_eval', 0) + balance.get('deposit', 0)
-            self.state.available_cash = balance.get('available', 0)
+        # 계좌 잔고 확인 (캐시 만료 시에만 재조회)
+        self._update_balance()
         
         # 미체결 주문 확인 (Restart 대응)
-        for code, position in self.state.positions.items():
+        for position in self._snapshot_positions():
             if position.state in (PositionState.ENTRY_PENDING, PositionState.EXIT_PENDING):
                 self.confirm_order(position)
 
         # 서버 등록 종목 로드 (아직 안했으면)
         if not self.state.universe:
             self.state.universe = self._load_universe_from_db()
+            self._save_universe_to_db(self.state.universe)
+            self._state_dirty = True
             
             # 포지션 초기화
-            for stock in self.state.universe:
-                if stock.code not in self.state.positions:
-                    self.state.positions[stock.code] = Position(
-                        code=stock.code,
-                        name=stock.name,
-                        state=PositionState.WATCHING,
-                        prev_close=stock.prev_close
-                    )
+            with self._positions_lock:
+                for stock in self.state.universe:
+                    if stock.code not in self.state.positions:
+                        self.state.positions[stock.code] = Position(
+                            code=stock.code,
+                            name=stock.name,
+                            state=PositionState.WATCHING,
+                            prev_close=stock.prev_close
+                        )
             
             # ntfy 알림
             if self.state.universe:
                 stock_list = ", ".join([s.name for s in self.state.universe[:10]])
-                send_ntfy_notification(
+                self._notify(
                     title="🎯 자동매매 준비 완료 (서버 등록 종목)",
                     message=f"[{self.state.today}] 감시 종목 {len(self.state.universe)}개\n{stock_list}",
                     priority="default",
                     tags=["gear", "stock"]
                 )
         
-        time.sleep(5)
+        self._sleep(5)
+    
+    def _snapshot_positions(self) -> List[Position]:
+        """포지션 목록 스냅샷 (Flask 요청 스레드의 추가/삭제와 무관하게 순회 가능)"""
+        with self._positions_lock:
+            return list(self.state.positions.values())
+    
+    def _run_per_position(self, handler, positions: List[Position]) -> list:
+        """종목별 처리(API 호출 포함)를 I/O 스레드 풀에서 병렬 실행하고 모두 끝날 때까지 대기
+        
+        타임아웃 없이 대기하여 다음 루프에서 같은 종목에 중복 주문이 나가지 않도록 함
+        (개별 API 호출은 자체 타임아웃을 가짐)
+        Returns: positions 순서대로 handler 반환값 (예외 발생 시 None)
+        """
+        if not positions:
+            return []
+        
+        pool = self._io_pool  # stop()이 중간에 None으로 바꿔도 이번 틱은 같은 풀을 사용
+        if pool is None:
+            return [handler(position) for position in positions]
+        
+        futures = []
+        for position in positions:
+            future = None
+            if pool is not None:
+                try:
+                    future = pool.submit(handler, position)
+                except RuntimeError:
+                    pool = None  # 풀이 이미 종료됨 -> 남은 종목은 현재 스레드에서 직렬 실행
+            futures.append(future)
+        
+        results = []
+        for future, position in zip(futures, positions):
+            try:
+                results.append(future.result() if future is not None else handler(position))
+            except Exception as e:
+                results.append(None)
+                self._log_event('ERROR', 'POSITION_TASK_ERROR', f'종목 처리 오류: {e}',
+                              code=position.code)
+        return results
+    
+    def _fetch_order_statuses(self, positions: List[Position]) -> Dict[str, dict]:
+        """체결 대기 주문이 있으면 당일 주문 상태를 1회 일괄 조회"""
+        if any(p.order_id and p.state in (PositionState.ENTRY_PENDING, PositionState.EXIT_PENDING)
+               for p in positions):
+            return self._get_all_order_statuses()
+        return {}
+    
+    def _entry_window_position(self, position: Position, order_statuses: Dict[str, dict] = None):
+        """진입 구간 종목별 처리"""
+        if position.state == PositionState.WATCHING:
+            # 진입 시그널 확인
+            if self.check_entry_signal(position):
+                self.execute_entry(position)
+        
+        elif position.state == PositionState.ENTRY_PENDING:
+            # 체결 확인
+            self.confirm_order(position, order_statuses)
+    
+    def _monitor_position(self, position: Position, order_statuses: Dict[str, dict] = None,
+                          quotes: Dict[str, int] = None) -> bool:
+        """장중 모니터링 종목별 처리
+        Returns: 보유 종목(ENTERED)의 현재가를 이번에 갱신했는지 여부
+        """
+        # 미체결 매수 주문 확인
+        if position.state == PositionState.ENTRY_PENDING:
+            self.confirm_order(position, order_statuses)
+        
+        # 현재가 갱신 (청산 시그널은 _check_exit_signals에서 일괄 판정)
+        elif position.state == PositionState.ENTERED:
+            if quotes and position.code in quotes:
+                position.current_price = quotes[position.code]
+                return True
+            price_data = self._get_current_price(position.code)
+            if price_data:
+                position.current_price = price_data.get('current_price', 0)
+                return True
+        
+        # 청산 주문 체결 확인
+        elif position.state == PositionState.EXIT_PENDING:
+            self.confirm_order(position, order_statuses)
+        
+        return False
+    
+    def _check_exit_signals(self, positions: List[Position]) -> List[Tuple[Position, str]]:
+        """보유 종목 전체의 청산 시그널(TP/SL/EOD)을 배열 연산으로 일괄 판정
+        
+        check_exit_signal과 같은 규칙(TP > SL > EOD 순)을 적용하고 미실현 손익도 함께 갱신
+        Returns: [(position, reason), ...]
+        """
+        if not positions:
+            return []
+        
+        n = len(positions)
+        entry = np.fromiter((p.entry_price for p in positions), dtype=np.float64, count=n)
+        current = np.fromiter((p.current_price for p in positions), dtype=np.float64, count=n)
+        qty = np.fromiter((p.quantity for p in positions), dtype=np.float64, count=n)
+        
+        valid = (entry > 0) & (current > 0)
+        pnl = (current - entry) * qty
+        pnl_rate = np.divide((current - entry) * 100, entry,
+                             out=np.zeros(n), where=valid)
+        
+        tp_hits = valid & (pnl_rate >= self.config.TAKE_PROFIT_RATE)
+        sl_hits = valid & ~tp_hits & (pnl_rate <= self.config.STOP_LOSS_RATE)
+        eod_hits = np.zeros(n, dtype=bool)
+        now = time.localtime()
+        if f"{now.tm_hour:02d}:{now.tm_min:02d}" >= self.config.EOD_SELL_START:
+            eod_hits = valid & ~tp_hits & ~sl_hits
+        
+        for i in np.flatnonzero(valid):
+            positions[i].unrealized_pnl = float(pnl[i])
+            positions[i].unrealized_pnl_rate = float(pnl_rate[i])
+        
+        signals = []
+        for reason, hits in (("TP", tp_hits), ("SL", sl_hits), ("EOD", eod_hits)):
+            signals.extend((positions[i], reason) for i in np.flatnonzero(hits))
+        return signals
+    
+    def _eod_closing_position(self, position: Position, order_statuses: Dict[str, dict] = None):
+        """장마감 청산 종목별 처리"""
+        if position.state == PositionState.ENTERED:
+            self.execute_exit(position, "EOD")
+        elif position.state == PositionState.EXIT_PENDING:
+            self.confirm_order(position, order_statuses)
     
     def _phase_entry_window(self):
         """진입 구간 (BUY_SCHEDULE에 따른 매수 실행)"""
-        for code, position in self.state.positions.items():
-            if position.state == PositionState.WATCHING:
-                # 진입 시그널 확인
-                if self.check_entry_signal(position):
-                    self.execute_entry(position)
-            
-            elif position.state == PositionState.ENTRY_PENDING:
-                # 체결 확인
-                self.confirm_order(position)
+        positions = self._snapshot_positions()
+        order_statuses = self._fetch_order_statuses(positions)
+        self._run_per_position(
+            lambda position: self._entry_window_position(position, order_statuses),
+            positions
+        )
         
-        time.sleep(0.5)
+        self._sleep(0.5)
     
     def _phase_monitoring(self):
         """장중 모니터링 (청산 감시)"""
-        for code, position in self.state.positions.items():
-            # 미체결 매수 주문 확인
-            if position.state == PositionState.ENTRY_PENDING:
-                self.confirm_order(position)
-            
-            # 청산 시그널 확인
-            elif position.state == PositionState.ENTERED:
-                should_exit, reason = self.check_exit_signal(position)
-                if should_exit:
-                    self.execute_exit(position, reason)
-            
-            # 청산 주문 체결 확인
-            elif position.state == PositionState.EXIT_PENDING:
-                self.confirm_order(position)
+        positions = self._snapshot_positions()
+        was_entered = [p.state == PositionState.ENTERED for p in positions]
+        
+        # 주문 상태/보유 종목 시세는 종목별 호출 대신 일괄 조회 (누락분만 종목별 조회)
+        order_statuses = self._fetch_order_statuses(positions)
+        quotes = self._get_current_prices([p.code for p, held in zip(positions, was_entered) if held])
+        refreshed = self._run_per_position(
+            lambda position: self._monitor_position(position, order_statuses, quotes),
+            positions
+        )
+        
+        # 현재가를 갱신한 보유 종목만 모아 청산 시그널 일괄 판정 후 청산 주문
+        entered = [p for p, held, ok in zip(positions, was_entered, refreshed) if held and ok]
+        exit_reasons = {p.code: reason for p, reason in self._check_exit_signals(entered)}
+        if exit_reasons:
+            self._run_per_position(
+                lambda position: self.execute_exit(position, exit_reasons[position.code]),
+                [p for p in entered if p.code in exit_reasons]
+            )
         
         # 일일 최대 손실 체크
         if self.state.total_asset > 0:
@@ -1492,26 +2071,28 @@ class AutoTradingEngine:
                 self._log_event('WARNING', 'DAILY_LOSS_LIMIT', 
                               f'일일 손실 한도 도달: {daily_loss_rate:.2f}%')
                 # 대기 중인 모든 종목 건너뜀
-                for position in self.state.positions.values():
+                for position in self._snapshot_positions():
                     if position.state == PositionState.WATCHING:
                         position.state = PositionState.SKIPPED
                         position.error_message = '일일 손실 한도 도달'
+                        self._state_dirty = True
         
-        time.sleep(1)
+        self._sleep(1)
     
     def _phase_eod_closing(self):
         """장마감 청산 (15:15~15:28)"""
-        for code, position in self.state.positions.items():
-            if position.state == PositionState.ENTERED:
-                self.execute_exit(position, "EOD")
-            elif position.state == PositionState.EXIT_PENDING:
-                self.confirm_order(position)
+        positions = self._snapshot_positions()
+        order_statuses = self._fetch_order_statuses(positions)
+        self._run_per_position(
+            lambda position: self._eod_closing_position(position, order_statuses),
+            positions
+        )
         
-        time.sleep(1)
+        self._sleep(1)
     
     def _phase_closed(self):
         """장 종료"""
-        time.sleep(60)
+        self._sleep(60)
     
     # =============================
     # 공개 API
@@ -1524,6 +2105,9 @@ class AutoTradingEngine:
         
         self._running = True
         self.state.is_running = True
+        self._wake.clear()
+        self._io_pool = ThreadPoolExecutor(max_workers=self.config.POLL_MAX_WORKERS,
+                                           thread_name_prefix='auto-trading-io')
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
         
@@ -1536,29 +2120,32 @@ class AutoTradingEngine:
         """자동매매 중지"""
         self._running = False
         self.state.is_running = False
+        self._wake.set()
         
         if self._thread:
             self._thread.join(timeout=5)
         
+        # 루프 스레드가 아직 실행 중이면(API 호출 대기 등) 풀은 루프가 끝날 때 정리
+        if self._thread is None or not self._thread.is_alive():
+            self._release_io_pool(self._io_pool)
+        
         self._log_event('INFO', 'STRATEGY_STOP', '자동매매 전략 중지')
         self._save_state()
+        self._flush_pending_writes()
         
         return {'success': True, 'message': '자동매매 중지됨'}
     
+    def wake(self):
+        """대기 중인 메인 루프를 즉시 깨워 현재 단계를 재평가"""
+        self._wake.set()
+    
     def get_status(self) -> dict:
         """현재 상태 조회"""
-        # 자산 정보 갱신 (캐시: 1분 이내면 스킵)
-        import time
-        now = time.time()
-        if not hasattr(self, '_last_balance_check') or now - self._last_balance_check > 60:
-            try:
-                balance = self._get_account_balance()
-                if 'error' not in balance:
-                    self.state.total_asset = balance.get('total_eval', 0)  # 총평가금액 (예수금 포함)
-                    self.state.available_cash = balance.get('available', 0)
-                    self._last_balance_check = now
-            except:
-                pass
+        # 자산 정보 갱신 (1분 이내면 캐시된 잔고 사용)
+        try:
+            self._update_balance()
+        except:
+            pass
         return self.state.to_dict()
     
     def manual_buy(self, code: str, quantity: int, auto_quantity: bool = False) -> dict:
@@ -1596,25 +2183,26 @@ class AutoTradingEngine:
                 return result
             
             # 포지션 생성/업데이트
-            if code not in self.state.positions:
-                self.state.positions[code] = Position(
-                    code=code,
-                    name='',  # 이름은 나중에 업데이트
-                    state=PositionState.ENTRY_PENDING,
-                    prev_close=price_data.get('prev_close', 0)
-                )
-            
-            position = self.state.positions[code]
-            position.state = PositionState.ENTRY_PENDING
-            position.order_id = result.get('order_no', '')
-            position.pending_quantity = quantity
+            with self._positions_lock:
+                if code not in self.state.positions:
+                    self.state.positions[code] = Position(
+                        code=code,
+                        name='',  # 이름은 나중에 업데이트
+                        state=PositionState.ENTRY_PENDING,
+                        prev_close=price_data.get('prev_close', 0)
+                    )
+                
+                position = self.state.positions[code]
+                position.state = PositionState.ENTRY_PENDING
+                position.order_id = result.get('order_no', '')
+                position.pending_quantity = quantity
             
             self._log_event('INFO', 'MANUAL_BUY', f'수동 매수 주문 (auto={auto_quantity})',
                           code=code,
                           data={'qty': quantity, 'order_no': result.get('order_no', ''), 'auto_quantity': auto_quantity})
             
             # ntfy 알림: 수동 매수 주문 실행
-            send_ntfy_notification(
+            self._notify(
                 title="🚀 수동 매수 주문 실행",
                 message=f"[{code}] {quantity}주 (시장가)",
                 priority="default",
@@ -1629,11 +2217,11 @@ class AutoTradingEngine:
     def manual_sell(self, code: str, quantity: int = 0) -> dict:
         """수동 매도 (quantity=0이면 전량)"""
         try:
-            if code not in self.state.positions:
+            with self._positions_lock:
+                position = self.state.positions.get(code)
+            if position is None:
                 return {'error': '해당 종목 포지션 없음'}
             
-            position = self.state.positions[code]
-            
             sell_qty = quantity if quantity > 0 else position.quantity
             if sell_qty <= 0:
                 return {'error': '매도할 수량 없음'}
@@ -1643,16 +2231,17 @@ class AutoTradingEngine:
             if 'error' in result:
                 return result
             
-            position.state = PositionState.EXIT_PENDING
-            position.exit_reason = 'MANUAL'
-            position.order_id = result.get('order_no', '')
+            with self._positions_lock:
+                position.state = PositionState.EXIT_PENDING
+                position.exit_reason = 'MANUAL'
+                position.order_id = result.get('order_no', '')
             
             self._log_event('INFO', 'MANUAL_SELL', f'수동 매도 주문',
                           code=code,
                           data={'qty': sell_qty, 'order_no': result.get('order_no', '')})
             
             # ntfy 알림: 수동 매도 주문 실행
-            send_ntfy_notification(
+            self._notify(
                 title="📢 수동 매도 주문 실행",
                 message=f"[{position.name or code}] {sell_qty}주 (시장가)",
                 priority="default",
@@ -1667,40 +2256,38 @@ class AutoTradingEngine:
     def refresh_positions(self):
         """포지션 동기화 (계좌 잔고 기준)"""
         try:
-            balance = self._get_account_balance()
+            # 계좌 정보 업데이트
+            balance = self._update_balance()
             if 'error' in balance:
                 return balance
             
             holdings = balance.get('holdings', {})
             
-            # 계좌 정보 업데이트
-            self.state.total_asset = balance.get('total_eval', 0)  # 총평가금액 (예수금 포함)
-            self.state.available_cash = balance.get('available', 0)
-            
             # 포지션 동기화
-            for code, holding in holdings.items():
-                if code in self.state.positions:
-                    position = self.state.positions[code]
-                    position.quantity = holding['quantity']
-                    position.current_price = holding['current_price']
-                    position.entry_price = holding['avg_price']
-                    position.unrealized_pnl = holding['profit_loss']
-                    position.unrealized_pnl_rate = holding['profit_rate']
+            with self._positions_lock:
+                for code, holding in holdings.items():
+                    if code in self.state.positions:
+                        position = self.state.positions[code]
+                        position.quantity = holding['quantity']
+                        position.current_price = holding['current_price']
+                        position.entry_price = holding['avg_price']
+                        position.unrealized_pnl = holding['profit_loss']
+                        position.unrealized_pnl_rate = holding['profit_rate']
                     
-                    if position.quantity > 0 and position.state not in [PositionState.ENTERED, PositionState.EXIT_PENDING]:
-                        position.state = PositionState.ENTERED
-                else:
-                    # 새로운 포지션 (외부에서 매수한 경우)
-                    self.state.positions[code] = Position(
-                        code=code,
-                        name=holding['name'],
-                        state=PositionState.ENTERED,
-                        quantity=holding['quantity'],
-                        entry_price=holding['avg_price'],
-                        current_price=holding['current_price'],
-                        unrealized_pnl=holding['profit_loss'],
-                        unrealized_pnl_rate=holding['profit_rate']
-                    )
+                        if position.quantity > 0 and position.state not in [PositionState.ENTERED, PositionState.EXIT_PENDING]:
+                            position.state = PositionState.ENTERED
+                    else:
+                        # 새로운 포지션 (외부에서 매수한 경우)
+                        self.state.positions[code] = Position(
+                            code=code,
+                            name=holding['name'],
+                            state=PositionState.ENTERED,
+                            quantity=holding['quantity'],
+                            entry_price=holding['avg_price'],
+                            current_price=holding['current_price'],
+                            unrealized_pnl=holding['profit_loss'],
+                            unrealized_pnl_rate=holding['profit_rate']
+                        )
             
             self._log_event('INFO', 'POSITIONS_SYNCED', f'포지션 동기화 완료')
             self._save_state()
@@ -1709,25 +2296,51 @@ class AutoTradingEngine:
         except Exception as e:
             return {'error': str(e)}
     
+    def replace_positions(self, keep_states, new_positions=()):
+        """keep_states 상태의 포지션만 남기고 new_positions 중 없는 종목을 추가 (Flask 요청 스레드용)"""
+        with self._positions_lock:
+            positions = {code: p for code, p in self.state.positions.items() if p.state in keep_states}
+            for position in new_positions:
+                positions.setdefault(position.code, position)
+            self.state.positions = positions
+    
+    def add_watch_position(self, position: Position) -> bool:
+        """포지션이 없는 종목만 추가 (Returns: 추가 여부)"""
+        with self._positions_lock:
+            if position.code in self.state.positions:
+                return False
+            self.state.positions[position.code] = position
+            return True
+    
+    def remove_positions(self, codes, protected_states) -> int:
+        """codes(None이면 전체) 중 protected_states 상태가 아닌 포지션 제거 (Returns: 제거한 개수)"""
+        removed = 0
+        with self._positions_lock:
+            for code in (list(self.state.positions) if codes is None else codes):
+                position = self.state.positions.get(code)
+                if position is not None and position.state not in protected_states:
+                    del self.state.positions[code]
+                    removed += 1
+        return removed
+    
     def get_trade_history(self, days: int = 7) -> list:
         """거래 내역 조회"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
             
-            cursor.execute("""
-                SELECT * FROM auto_trading_trades
-                WHERE trade_date >= ?
-                ORDER BY created_at DESC
-            """, (start_date,))
+            # 아직 반영되지 않은 거래가 조회에서 빠지지 않도록 먼저 반영
+            self._flush_trades()
             
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
-            conn.close()
+            with self._db_lock:
+                rows = self._get_conn().execute("""
+                    SELECT id, trade_date, code, name, trade_type, quantity, price, amount,
+                           exit_reason, pnl, pnl_rate, created_at
+                    FROM auto_trading_trades
+                    WHERE trade_date >= ?
+                    ORDER BY created_at DESC
+                """, (start_date,)).fetchall()
             
-            return [dict(zip(columns, row)) for row in rows]
+            return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"거래 내역 조회 실패: {e}")
             return []
@@ -1736,40 +2349,47 @@ class AutoTradingEngine:
 # =============================
 # 전역 인스턴스 (Flask 앱에서 사용)
 # =============================
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
-
 # 모의/실전 투자 엔진 각각 유지
 _auto_trading_engine_mock: Optional[AutoTradingEngine] = None
 _auto_trading_engine_real: Optional[AutoTradingEngine] = None
 _current_mode: str = "mock"  # 현재 활성 모드
 
+_engine_init_lock = threading.Lock()  # 엔진 생성 시에만 사용 (중복 생성 방지)
+
+
+@functools.cache
+def _resolve_db_file() -> str:
+    """엔진 DB 파일 경로 (DB_PATH 환경변수 기준, 최초 1회만 계산)"""
+    db_path = os.environ.get('DB_PATH', os.path.dirname(__file__))
+    if db_path and db_path != os.path.dirname(__file__):
+        return os.path.join(db_path, 'mystock.db')
+    return os.path.join(os.path.dirname(__file__), 'mystock.db')
+
+
 def get_auto_trading_engine(mode: str = None) -> AutoTradingEngine:
     """자동매매 엔진 싱글톤 (모의/실전 분리)"""
-    global _auto_trading_engine_mock, _auto_trading_engine_real, _current_mode
+    global _auto_trading_engine_mock, _auto_trading_engine_real
     
     # 모드 지정이 없으면 현재 모드 사용
     if mode is None:
         mode = _current_mode
     
-    db_path = os.environ.get('DB_PATH', os.path.dirname(__file__))
-    if db_path and db_path != os.path.dirname(__file__):
-        db_file = os.path.join(db_path, 'mystock.db')
-    else:
-        db_file = os.path.join(os.path.dirname(__file__), 'mystock.db')
-    
     is_mock = (mode == "mock")
     
-    if is_mock:
-        if _auto_trading_engine_mock is None:
-            _auto_trading_engine_mock = AutoTradingEngine(db_file, is_mock=True)
-        return _auto_trading_engine_mock
-    else:
-        if _auto_trading_engine_real is None:
-            _auto_trading_engine_real = AutoTradingEngine(db_file, is_mock=False)
-        return _auto_trading_engine_real
+    # 이미 생성된 엔진은 락 없이 바로 반환
+    engine = _auto_trading_engine_mock if is_mock else _auto_trading_engine_real
+    if engine is not None:
+        return engine
+    
+    with _engine_init_lock:
+        if is_mock:
+            if _auto_trading_engine_mock is None:
+                _auto_trading_engine_mock = AutoTradingEngine(_resolve_db_file(), is_mock=True)
+            return _auto_trading_engine_mock
+        else:
+            if _auto_trading_engine_real is None:
+                _auto_trading_engine_real = AutoTradingEngine(_resolve_db_file(), is_mock=False)
+            return _auto_trading_engine_real
 
 
 def set_auto_trading_mode(mode: str) -> dict:
@@ -11,9 +11,18 @@ KRX 일봉 데이터 수집 프레임워크 (병렬 처리 버전)
 import argparse
 import json
 import os
+import re
+import shutil
+import threading
 import time
 import pandas as pd
 import numpy as np
+from pandas.api.types import is_numeric_dtype
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import FinanceDataReader as fdr
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -26,6 +35,12 @@ except ImportError:
 
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
@@ -33,20 +48,35 @@ load_dotenv()
 # -----------------------------
 # 네트워크 체크 유틸리티
 # -----------------------------
+_NETWORK_CHECK_HOSTS = (
+    "https://www.naver.com",
+    "https://www.google.com",
+    "https://finance.yahoo.com",
+)
+
+# 연결 확인용 세션 (keep-alive로 대기 루프의 반복 확인 시 TLS 핸드셰이크 재사용)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=len(_NETWORK_CHECK_HOSTS), pool_maxsize=len(_NETWORK_CHECK_HOSTS)))
+
+
+def _probe_host(host: str, timeout: int) -> bool:
+    try:
+        # 본문이 필요 없으므로 HEAD (리다이렉트도 따라가지 않음: 응답만 오면 연결된 것)
+        _SESSION.head(host, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
 def check_network_connection(timeout: int = 5) -> bool:
-    """인터넷 연결 확인 (여러 호스트 시도)"""
-    hosts = [
-        "https://www.naver.com",
-        "https://www.google.com",
-        "https://finance.yahoo.com"
-    ]
-    for host in hosts:
-        try:
-            requests.get(host, timeout=timeout)
-            return True
-        except Exception:
-            continue
-    return False
+    """인터넷 연결 확인 (여러 호스트 동시 시도, 하나라도 응답하면 True)"""
+    executor = ThreadPoolExecutor(max_workers=len(_NETWORK_CHECK_HOSTS))
+    try:
+        futures = [executor.submit(_probe_host, host, timeout) for host in _NETWORK_CHECK_HOSTS]
+        return any(f.result() for f in as_completed(futures))
+    finally:
+        # 첫 성공 시 나머지 응답은 기다리지 않음
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def wait_for_network(max_wait_seconds: int = 300, check_interval: int = 10) -> bool:
@@ -63,10 +93,16 @@ def wait_for_network(max_wait_seconds: int = 300, check_interval: int = 10) -> b
 def _atomic_to_parquet(df: pd.DataFrame, out_path: str) -> None:
     """Write parquet atomically to avoid partially-written/corrupted files."""
     tmp_path = out_path + ".tmp"
-    df.to_parquet(tmp_path, index=False)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # 버퍼링된 파일 싱크로 한 번에 기록 (zstd 압축)
+    with pa.OSFile(tmp_path, "wb") as sink:
+        pq.write_table(table, sink, compression="zstd", row_group_size=64 * 1024)
     os.replace(tmp_path, out_path)
 
 
+_INT32_MAX = np.iinfo(np.int32).max
+
+
 def _normalize_bars_df(df: pd.DataFrame, df_krx: pd.DataFrame | None = None) -> pd.DataFrame:
     """Normalize and validate bars dataframe schema.
 
@@ -76,9 +112,18 @@ def _normalize_bars_df(df: pd.DataFrame, df_krx: pd.DataFrame | None = None) ->
     if df is None or df.empty:
         raise ValueError("bars dataframe is empty")
 
-    out = df.copy()
+    # validate the schema first (O(columns)) so malformed frames fail before any data work;
+    # a missing `code` may still be recovered below (alias or name mapping)
+    required = ['date', 'code', 'open', 'high', 'low', 'close', 'volume']
+    lowered = [str(c).lower() for c in df.columns]
+    missing = [c for c in required if c != 'code' and c not in lowered]
+    if missing:
+        raise ValueError(f"bars dataframe missing required columns: {missing}")
+
+    # shallow copy: columns are replaced below, never mutated in place, so no data copy is needed
+    out = df.copy(deep=False)
     # normalize column names
-    out.columns = [str(c).lower() for c in out.columns]
+    out.columns = lowered
     if 'code' not in out.columns:
         # try common alternatives
         if 'Code' in df.columns:
@@ -89,39 +134,50 @@ def _normalize_bars_df(df: pd.DataFrame, df_krx: pd.DataFrame | None = None) ->
     if 'code' not in out.columns:
         if 'name' in out.columns and df_krx is not None and not df_krx.empty:
             # recover by name mapping (best-effort)
-            tmp = df_krx.copy()
-            if 'Code' in tmp.columns and 'Name' in tmp.columns:
-                tmp['Code'] = tmp['Code'].apply(_zfill_code)
-                name_to_code = dict(zip(tmp['Name'].astype(str), tmp['Code'].astype(str)))
+            # build the mapping from the two columns only (no copy of the full listing)
+            if 'Code' in df_krx.columns and 'Name' in df_krx.columns:
+                name_to_code = dict(zip(df_krx['Name'].astype(str), _zfill_codes(df_krx['Code'])))
                 out['code'] = out['name'].astype(str).map(name_to_code)
 
-    required = ['date', 'code', 'open', 'high', 'low', 'close', 'volume']
     missing = [c for c in required if c not in out.columns]
     if missing:
         raise ValueError(f"bars dataframe missing required columns: {missing}")
 
-    out['code'] = out['code'].astype(str).str.zfill(6)
+    out['code'] = _zfill_codes(out['code'])
     out['date'] = pd.to_datetime(out['date'], errors='coerce')
-    out = out.dropna(subset=['date', 'code'])
-    # numeric coercions
-    for c in ['open', 'high', 'low', 'close', 'volume']:
-        out[c] = pd.to_numeric(out[c], errors='coerce')
+    # drop only when needed (dropna always copies the whole frame)
+    valid = out['date'].notna() & out['code'].notna()
+    if not valid.all():
+        out = out[valid]
+    # numeric coercions (skip columns that already have a numeric dtype, the usual case)
+    for c in ['open', 'high', 'low', 'close', 'volume', 'change']:
+        if c in out.columns and not is_numeric_dtype(out[c]):
+            out[c] = pd.to_numeric(out[c], errors='coerce')
     # optional fields
-    if 'change' in out.columns:
-        out['change'] = pd.to_numeric(out['change'], errors='coerce')
-    else:
+    if 'change' not in out.columns:
         # keep downstream compatibility
         out['change'] = np.nan
     if 'name' in out.columns:
         out['name'] = out['name'].astype(str)
 
+    # compact dtypes: KRX prices are whole KRW and fit in int32; change ratio fits float32.
+    # volume is downcast only when the whole partition fits (extreme names stay int64)
+    for c in ['open', 'high', 'low', 'close', 'volume']:
+        col = out[c]
+        if col.notna().all() and col.abs().max() <= _INT32_MAX and (col % 1 == 0).all():
+            out[c] = col.astype('int32')
+    out['change'] = out['change'].astype('float32')
+
     # keep a stable column order
     ordered = ['date', 'code', 'open', 'high', 'low', 'close', 'volume', 'change']
     if 'name' in out.columns:
         ordered.append('name')
     # append any extra columns at the end
     extras = [c for c in out.columns if c not in ordered]
-    return out[ordered + extras]
+    columns = ordered + extras
+    if list(out.columns) == columns:
+        return out
+    return out[columns]
 
 
 def repair_bars_partition(target_date: str) -> str | None:
@@ -129,8 +185,8 @@ def repair_bars_partition(target_date: str) -> str | None:
 
     This is intended for recovering from a bad write (e.g. scheduled crawl failure).
     """
-    save_dir = os.path.join(DATA_DIR, f"date={target_date}")
-    save_path = os.path.join(save_dir, "part-0000.parquet")
+    save_path = bars_partition_path(target_date)
+    save_dir = os.path.dirname(save_path)
     if not os.path.exists(save_path):
         print(f"[REPAIR] Partition not found: {save_path}")
         return None
@@ -148,7 +204,7 @@ def repair_bars_partition(target_date: str) -> str | None:
     print(f"[REPAIR] Missing code column; attempting recovery by name mapping: {save_path}")
     try:
         df_krx = _get_krx_listing()
-        df_krx['Code'] = df_krx['Code'].apply(_zfill_code)
+        df_krx['Code'] = _zfill_codes(df_krx['Code'])
         fixed = _normalize_bars_df(df, df_krx=df_krx)
         ensure_dir(save_dir)
         _atomic_to_parquet(fixed, save_path)
@@ -163,8 +219,13 @@ def repair_bars_partition(target_date: str) -> str | None:
 # -----------------------------
 DATA_DIR = "data/krx/bars"
 UNIVERSE_DIR = "data/krx/master/universe_mcap500"
+KRX_LISTING_CACHE_PATH = "data/krx/master/krx_listing.parquet"
+KRX_LISTING_CACHE_MAX_AGE_SEC = 6 * 3600  # 종목 리스트 디스크 캐시 유효 시간 (장중 반복 실행 시 재다운로드 방지)
 UNIVERSE_JSON_PATH = "data/user/universe_mcap500.json"
-MAX_WORKERS = 8  # 병렬 작업 개수 (너무 높으면 차단될 수 있음, 8~16 추천)
+MAX_WORKERS = 16  # 병렬 작업 개수 (요청 속도는 MAX_REQUESTS_PER_SEC로 별도 제한)
+MAX_REQUESTS_PER_SEC = 20  # 전체 워커 합산 초당 최대 요청 수 (차단 방지)
+RANGE_CHUNK_DATES = 250  # 범위 수집 시 한 번에 받아 저장할 날짜 수 (약 1년치, 메모리 상한)
+SNAPSHOT_MAX_CONSECUTIVE_FAILURES = 5  # 스냅샷 네트워크 실패가 이만큼 연속되면 남은 날짜는 종목별 수집으로
 START_YEAR = 2020  # 수집 시작 연도 (최초 실행시)
 MCAP_THRESHOLD_KRW = 50_000_000_000  # 500억
 
@@ -181,22 +242,38 @@ def get_recent_business_day():
 
 
 def _parse_ymd(date_str: str) -> datetime:
+    # 고정 포맷(YYYY-MM-DD)은 슬라이싱으로 파싱 (strptime보다 훨씬 빠름), 그 외는 strptime으로 검증
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+        try:
+            return datetime(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10]))
+        except ValueError:
+            pass
     return datetime.strptime(date_str, "%Y-%m-%d")
 
 
-def iter_dates_inclusive(start_date: str, end_date: str) -> list[str]:
-    """Return YYYY-MM-DD list from start..end inclusive."""
+def iter_dates_inclusive(start_date: str, end_date: str, weekdays_only: bool = False) -> list[str]:
+    """Return YYYY-MM-DD list from start..end inclusive.
+
+    weekdays_only=True returns Mon-Fri only (does not know KRX holidays).
+    """
     start_dt = _parse_ymd(start_date)
     end_dt = _parse_ymd(end_date)
     if end_dt < start_dt:
         raise ValueError(f"end_date < start_date: {start_date}..{end_date}")
 
-    out: list[str] = []
-    cur = start_dt
-    while cur <= end_dt:
-        out.append(cur.strftime("%Y-%m-%d"))
-        cur += timedelta(days=1)
-    return out
+    freq = "B" if weekdays_only else "D"
+    return pd.date_range(start_dt, end_dt, freq=freq).strftime("%Y-%m-%d").tolist()
+
+
+def bars_partition_path(date_str: str) -> str:
+    """bars 파티션 파일 경로 (data/krx/bars/date=YYYY-MM-DD/part-0000.parquet)"""
+    return os.path.join(DATA_DIR, f"date={date_str}", "part-0000.parquet")
+
+
+def _format_date_span(date_list: list[str]) -> str:
+    if len(date_list) == 1:
+        return date_list[0]
+    return f"{date_list[0]}~{date_list[-1]} ({len(date_list)} dates)"
 
 
 def is_weekday(date_str: str) -> bool:
@@ -204,23 +281,19 @@ def is_weekday(date_str: str) -> bool:
     return _parse_ymd(date_str).weekday() < 5
 
 def ensure_dir(path):
-    if not os.path.exists(path):
-        os.makedirs(path)
+    os.makedirs(path, exist_ok=True)
 
 
-def _zfill_code(code: str) -> str:
-    return str(code).zfill(6)
+def _zfill_codes(codes: pd.Series) -> pd.Series:
+    """종목코드 6자리 zero-padding (행 단위 apply 대신 pandas 문자열 연산)"""
+    return codes.astype(str).str.zfill(6)
 
 
 def get_recent_trading_days(n: int = 3) -> list[str]:
     """최근 N 영업일(거래일) 목록 반환 (주말 제외, 공휴일은 정확하지 않음)"""
-    days = []
-    check_date = datetime.now()
-    while len(days) < n:
-        check_date -= timedelta(days=1)
-        if check_date.weekday() < 5:  # 평일만
-            days.append(check_date.strftime("%Y-%m-%d"))
-    return days
+    yesterday = pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=1)
+    days = pd.bdate_range(end=yesterday, periods=n)  # 평일만
+    return days[::-1].strftime("%Y-%m-%d").tolist()
 
 
 def get_suspended_codes(lookback_days: int = 3) -> set[str]:
@@ -228,50 +301,92 @@ def get_suspended_codes(lookback_days: int = 3) -> set[str]:
     최근 N 영업일 내 거래정지 이력(volume=0)이 있는 종목 코드 집합 반환.
     - bars 파티션에서 최근 데이터를 확인하여 volume=0인 종목을 찾음
     """
-    recent_dates = get_recent_trading_days(lookback_days)
+    paths = [bars_partition_path(d) for d in get_recent_trading_days(lookback_days)]
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return set()
+
+    # 파티션 읽기는 I/O 위주이므로 날짜별로 동시에 읽음
     suspended_codes = set()
-    
-    for date_str in recent_dates:
-        partition_path = os.path.join(DATA_DIR, f"date={date_str}", "part-0000.parquet")
-        if os.path.exists(partition_path):
-            try:
-                df = pd.read_parquet(partition_path)
-                if "volume" in df.columns and "code" in df.columns:
-                    # volume이 0 또는 NaN인 종목 추출
-                    zero_vol = df[(df["volume"].isna()) | (df["volume"] == 0)]
-                    suspended_codes.update(zero_vol["code"].apply(_zfill_code).tolist())
-            except Exception as e:
-                print(f"[WARN] Failed to read {partition_path}: {e}")
-    
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        for codes in executor.map(_read_zero_volume_codes, paths):
+            if codes:
+                suspended_codes.update(codes)
+
     return suspended_codes
 
 
+def _read_zero_volume_codes(partition_path: str) -> list[str] | None:
+    """파티션 하나에서 volume이 0 또는 NaN인 종목 코드 목록 (읽기 실패 시 None)
+
+    code 컬럼만, volume 조건에 맞는 행만 읽는다 (predicate/column pushdown).
+    """
+    try:
+        names = pq.read_schema(partition_path).names
+        if "volume" not in names or "code" not in names:
+            return []
+        volume = ds.field("volume")
+        table = pq.read_table(partition_path, columns=["code"], filters=(volume == 0) | volume.is_null())
+    except Exception as e:
+        print(f"[WARN] Failed to read {partition_path}: {e}")
+        return None
+    codes = pc.cast(table.column("code"), pa.string())
+    return pc.utf8_lpad(codes, width=6, padding="0").to_pylist()
+
+
+# (mtime, mapping) - 범위 수집 시 날짜마다 CSV를 다시 읽지 않도록 프로세스 내 캐시
+_share_count_cache: tuple[float, dict] | None = None
+_share_count_lock = threading.Lock()
+
+
 def load_share_count_mapping() -> dict:
-    """public/korea_stocks.csv의 상장주식수 매핑 로드 (code -> shares)."""
+    """public/korea_stocks.csv의 상장주식수 매핑 로드 (code -> shares).
+
+    파일이 바뀌지 않았으면(mtime 동일) 캐시된 매핑을 반환한다.
+    """
+    global _share_count_cache
     csv_path = "public/korea_stocks.csv"
-    if not os.path.exists(csv_path):
-        return {}
     try:
-        df = pd.read_csv(csv_path)
-        if "단축코드" not in df.columns or "상장주식수" not in df.columns:
-            return {}
-        df["단축코드"] = df["단축코드"].apply(lambda x: str(x).zfill(6))
-        return dict(zip(df["단축코드"], df["상장주식수"]))
-    except Exception:
+        mtime = os.path.getmtime(csv_path)
+    except OSError:
         return {}
 
+    cached = _share_count_cache
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _share_count_lock:
+        cached = _share_count_cache
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            # 필요한 2개 컬럼만 파싱 (pyarrow 멀티스레드 CSV 리더), 코드는 문자열로 읽음
+            # 컬럼이 없으면 ArrowInvalid/KeyError -> 빈 매핑
+            tbl = pacsv.read_csv(
+                csv_path,
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=["단축코드", "상장주식수"],
+                    column_types={"단축코드": pa.string()},
+                ),
+            )
+            codes = pc.utf8_lpad(tbl.column("단축코드"), width=6, padding="0")
+            mapping = dict(zip(codes.to_pylist(), tbl.column("상장주식수").to_pylist()))
+        except Exception:
+            return {}
+        _share_count_cache = (mtime, mapping)
+        return mapping
+
 
 def build_universe_cache_from_bars(target_date: str, bars_path: str) -> pd.DataFrame:
     """해당 날짜 bars parquet 기준으로 시총 500억 유니버스 캐시 생성."""
     if not os.path.exists(bars_path):
         raise FileNotFoundError(f"bars not found: {bars_path}")
 
-    df = pd.read_parquet(bars_path)
+    df = pd.read_parquet(bars_path, columns=["code", "close"])
     if df.empty:
         raise ValueError("bars parquet is empty")
 
-    df = df.copy()
-    df["code"] = df["code"].apply(_zfill_code)
+    df["code"] = _zfill_codes(df["code"])
 
     shares_map = load_share_count_mapping()
     if not shares_map:
@@ -286,16 +401,25 @@ def build_universe_cache_from_bars(target_date: str, bars_path: str) -> pd.DataF
     return uni
 
 
-def save_universe_cache(target_date: str, universe_df: pd.DataFrame) -> None:
-    """유니버스 캐시를 parquet+json로 저장."""
-    ensure_dir(UNIVERSE_DIR)
+def save_universe_cache(target_date: str, universe_df: pd.DataFrame, update_latest: bool = True) -> None:
+    """유니버스 캐시를 parquet+json로 저장.
+
+    update_latest=False면 날짜 파티션만 저장 (latest.parquet / JSON은 건드리지 않음).
+    """
     dated_dir = os.path.join(UNIVERSE_DIR, f"date={target_date}")
     ensure_dir(dated_dir)
     dated_path = os.path.join(dated_dir, "part-0000.parquet")
-    universe_df.to_parquet(dated_path, index=False)
+    _atomic_to_parquet(universe_df, dated_path)
+    if update_latest:
+        _publish_latest_universe(target_date, universe_df, dated_path)
 
+
+def _publish_latest_universe(target_date: str, universe_df: pd.DataFrame, dated_path: str) -> None:
+    """날짜 파티션을 latest.parquet로 복사하고 JSON 코드 목록 갱신."""
+    # latest는 같은 내용이므로 다시 인코딩하지 않고 파일 복사 (원자적 교체)
     latest_path = os.path.join(UNIVERSE_DIR, "latest.parquet")
-    universe_df.to_parquet(latest_path, index=False)
+    shutil.copyfile(dated_path, latest_path + ".tmp")
+    os.replace(latest_path + ".tmp", latest_path)
 
     # JSON (빠른 로드용)
     ensure_dir(os.path.dirname(UNIVERSE_JSON_PATH))
@@ -304,32 +428,124 @@ def save_universe_cache(target_date: str, universe_df: pd.DataFrame) -> None:
         "threshold_krw": MCAP_THRESHOLD_KRW,
         "codes": universe_df["code"].astype(str).tolist(),
     }
-    with open(UNIVERSE_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        with open(UNIVERSE_JSON_PATH, "wb") as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        with open(UNIVERSE_JSON_PATH, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
 
 
-def load_universe_codes() -> list:
-    """저장된 유니버스 캐시에서 code list 로드 (latest 우선)."""
-    latest_path = os.path.join(UNIVERSE_DIR, "latest.parquet")
-    if os.path.exists(latest_path):
-        df = pd.read_parquet(latest_path)
+_universe_codes_cache: tuple[str, float, list] | None = None
+
+
+def _read_universe_codes(path: str) -> list | None:
+    """유니버스 파일 하나에서 code list 로드 (parquet에 code가 없으면 None)."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
         if not df.empty and "code" in df.columns:
-            return df["code"].astype(str).str.zfill(6).tolist()
+            return _zfill_codes(df["code"]).tolist()
+        return None
 
-    if os.path.exists(UNIVERSE_JSON_PATH):
-        try:
-            with open(UNIVERSE_JSON_PATH, "r", encoding="utf-8") as f:
+    try:
+        if orjson is not None:
+            with open(path, "rb") as f:
+                payload = orjson.loads(f.read())
+        else:
+            with open(path, "r", encoding="utf-8") as f:
                 payload = json.load(f)
-            codes = payload.get("codes", [])
-            return [str(c).zfill(6) for c in codes]
-        except Exception:
-            return []
+        codes = payload.get("codes", [])
+        return _zfill_codes(pd.Series(codes, dtype=object)).tolist()
+    except Exception:
+        return []
+
+
+def load_universe_codes() -> list:
+    """저장된 유니버스 캐시에서 code list 로드 (latest 우선).
+
+    파일이 바뀌지 않았으면(경로, mtime 동일) 캐시된 목록의 사본을 반환한다.
+    """
+    global _universe_codes_cache
+    latest_path = os.path.join(UNIVERSE_DIR, "latest.parquet")
+    for path in (latest_path, UNIVERSE_JSON_PATH):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        cached = _universe_codes_cache
+        if cached is not None and cached[0] == path and cached[1] == mtime:
+            return list(cached[2])
+        codes = _read_universe_codes(path)
+        if codes is None:
+            continue
+        _universe_codes_cache = (path, mtime, codes)
+        return list(codes)
 
     return []
 
+# -----------------------------
+# 요청 속도 제한
+# -----------------------------
+class _RateLimiter:
+    """초당 요청 수를 제한하는 토큰 버킷 (스레드 안전).
+
+    워커 수를 늘려도 전체 요청 속도는 rate_per_sec 이하로 유지된다.
+    토큰이 부족하면 미리 예약(음수 잔고)한 뒤 락 밖에서 대기한다.
+    서버가 요청 제한(429 등)을 알리면 slow_down()으로 cooldown_sec 동안 속도를 절반씩 낮춘다.
+    """
+
+    def __init__(self, rate_per_sec: float, cooldown_sec: float = 30.0, min_rate: float = 1.0):
+        self._base_rate = float(rate_per_sec)
+        self._rate = self._base_rate
+        self._tokens = self._base_rate
+        self._min_rate = float(min_rate)
+        self._cooldown = float(cooldown_sec)
+        self._slow_until = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def slow_down(self) -> None:
+        with self._lock:
+            self._rate = max(self._min_rate, self._rate / 2)
+            self._tokens = min(self._tokens, 0.0)  # 남은 버스트 허용량 제거
+            self._slow_until = time.monotonic() + self._cooldown
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._slow_until and now >= self._slow_until:
+                # 제한 구간이 지나면 원래 속도로 복귀
+                self._rate = self._base_rate
+                self._slow_until = 0.0
+            self._tokens = min(self._rate, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= 1.0
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+_rate_limiter = _RateLimiter(MAX_REQUESTS_PER_SEC)
+
 # -----------------------------
 # 크롤링 코어 로직
 # -----------------------------
+# 재시도 대상(네트워크) 오류 판별용 키워드 (한 번만 컴파일)
+_NETWORK_ERROR_RE = re.compile(r"connection|timeout|network|unreachable|refused", re.IGNORECASE)
+
+
+# 서버 요청 제한(throttling) 오류 판별용
+_THROTTLE_ERROR_RE = re.compile(r"429|too many requests|rate.?limit", re.IGNORECASE)
+
+
+def _is_network_error(e: Exception) -> bool:
+    return _NETWORK_ERROR_RE.search(str(e)) is not None
+
+
+def _is_throttle_error(e: Exception) -> bool:
+    return _THROTTLE_ERROR_RE.search(str(e)) is not None
+
+
 def process_single_stock(code, date_start, date_end, max_retries: int = 3):
     """
     한 종목의 기간 데이터를 가져옵니다. (네트워크 오류 시 재시도)
@@ -338,6 +554,7 @@ def process_single_stock(code, date_start, date_end, max_retries: int = 3):
         try:
             # FDRDataReader는 symbol, start, end
             # KRX 종목코드는 숫자로만 되어있을 수 있으므로 확인 필요하지만 fdr이 알아서 처리함
+            _rate_limiter.acquire()
             df = fdr.DataReader(code, date_start, date_end)
             if df.empty:
                 return None
@@ -362,9 +579,12 @@ def process_single_stock(code, date_start, date_end, max_retries: int = 3):
             return df[available_cols]
             
         except Exception as e:
-            error_str = str(e).lower()
+            # 요청 제한이면 전체 요청 속도를 낮춘 뒤 재시도
+            throttled = _is_throttle_error(e)
+            if throttled:
+                _rate_limiter.slow_down()
             # 네트워크 관련 오류인 경우 재시도
-            if any(keyword in error_str for keyword in ['connection', 'timeout', 'network', 'unreachable', 'refused']):
+            if throttled or _is_network_error(e):
                 if attempt < max_retries - 1:
                     time.sleep(2 * (attempt + 1))  # 점진적 대기
                     continue
@@ -373,15 +593,64 @@ def process_single_stock(code, date_start, date_end, max_retries: int = 3):
     return None
 
 
-def _get_krx_listing(max_retries: int = 3) -> pd.DataFrame:
-    """KRX 종목 리스트 가져오기 (네트워크 오류 시 재시도)"""
+_KRX_LISTING_CACHE_COLUMNS = ["Code", "Name", "Market"]
+
+
+def _load_cached_krx_listing(max_age_sec: float = KRX_LISTING_CACHE_MAX_AGE_SEC) -> pd.DataFrame | None:
+    """디스크에 캐시된 종목 리스트 (없거나 오래됐거나 깨졌으면 None)"""
+    try:
+        age = time.time() - os.path.getmtime(KRX_LISTING_CACHE_PATH)
+    except OSError:
+        return None
+    if age >= max_age_sec:
+        return None
+    try:
+        df = pd.read_parquet(KRX_LISTING_CACHE_PATH)
+    except Exception:
+        return None
+    if df.empty or not {"Code", "Name"} <= set(df.columns):
+        return None
+    return df
+
+
+def _save_krx_listing_cache(df_krx: pd.DataFrame) -> None:
+    cols = [c for c in _KRX_LISTING_CACHE_COLUMNS if c in df_krx.columns]
+    try:
+        ensure_dir(os.path.dirname(KRX_LISTING_CACHE_PATH))
+        _atomic_to_parquet(df_krx[cols], KRX_LISTING_CACHE_PATH)
+    except Exception as e:
+        print(f"[WARN] Failed to cache KRX listing: {e}")
+
+
+# (로드 시각, DataFrame) - 같은 프로세스에서 반복 호출 시 디스크/네트워크 모두 생략
+_krx_listing_memo: tuple[float, pd.DataFrame] | None = None
+
+
+def _get_krx_listing(max_retries: int = 3, use_cache: bool = True) -> pd.DataFrame:
+    """KRX 종목 리스트 가져오기 (메모리 -> 디스크 캐시 우선, 네트워크 오류 시 재시도)
+
+    호출측에서 컬럼을 수정하므로 항상 복사본을 반환한다.
+    """
+    global _krx_listing_memo
+    if use_cache:
+        memo = _krx_listing_memo
+        if memo is not None and time.time() - memo[0] < KRX_LISTING_CACHE_MAX_AGE_SEC:
+            return memo[1].copy()
+        cached = _load_cached_krx_listing()
+        if cached is not None:
+            print(f">>> 종목 리스트 캐시 사용: {KRX_LISTING_CACHE_PATH} ({len(cached)}개)")
+            _krx_listing_memo = (time.time(), cached)
+            return cached.copy()
+
     print(">>> 종목 리스트 가져오는 중...")
     for attempt in range(max_retries):
         try:
-            return fdr.StockListing("KRX")
+            df_krx = fdr.StockListing("KRX")
+            _save_krx_listing_cache(df_krx)
+            _krx_listing_memo = (time.time(), df_krx)
+            return df_krx.copy()
         except Exception as e:
-            error_str = str(e).lower()
-            if any(keyword in error_str for keyword in ['connection', 'timeout', 'network', 'unreachable']):
+            if _is_network_error(e):
                 if attempt < max_retries - 1:
                     print(f"[WARN] KRX listing fetch failed (attempt {attempt + 1}), retrying...")
                     time.sleep(5 * (attempt + 1))
@@ -390,45 +659,130 @@ def _get_krx_listing(max_retries: int = 3) -> pd.DataFrame:
     raise RuntimeError("Failed to fetch KRX listing after retries")
 
 
-def update_data_parallel(
-    target_date: str | None = None,
-    codes: list[str] | None = None,
-    merge_existing: bool = False,
-    lookback_days: int = 5,
-) -> str | None:
-    """병렬 처리로 일봉(또는 장중 last) 데이터를 수집하여 parquet로 저장.
+# 메시지와 무관하게 일시적 실패로 보는 예외 (예: "Read timed out")
+_TRANSIENT_ERRORS = (ConnectionError, TimeoutError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
 
-    - codes=None: 전체 종목
-    - merge_existing=True: 기존 date 파티션이 있으면 code 단위로 업데이트
+_SNAPSHOT_COLUMNS = {"시가": "open", "고가": "high", "저가": "low", "종가": "close", "거래량": "volume", "등락률": "change"}
 
-    Returns: 저장된 parquet 경로 (성공), None (실패)
-    """
-    if target_date is None:
-        target_date = datetime.now().strftime("%Y-%m-%d")
 
+def _fetch_bars_snapshot(target_date: str, df_krx: pd.DataFrame, max_retries: int = 3) -> pd.DataFrame | None:
+    """KRX 전종목 OHLCV 스냅샷(pykrx) 1회 요청으로 target_date 일봉 구성.
+
+    Returns: df_krx 종목으로 한정한 DataFrame (휴장일이면 빈 DataFrame),
+             pykrx가 없거나 요청/응답이 비정상이면 None (호출측에서 종목별 수집으로 fallback)
+    Raises: 네트워크/요청 제한 오류가 재시도 후에도 계속되면 마지막 예외 (일시적 실패)
+    """
     try:
-        df_krx = _get_krx_listing()
-    except Exception as e:
-        print(f"Error fetching stock listing: {e}")
+        from pykrx import stock as krx_stock  # 무거운 import(matplotlib 등)이므로 필요할 때만
+    except ImportError:
         return None
 
-    df_krx["Code"] = df_krx["Code"].apply(_zfill_code)
-    if codes:
-        codes_set = {str(c).zfill(6) for c in codes}
-        df_krx = df_krx[df_krx["Code"].isin(codes_set)].copy()
+    for attempt in range(max_retries):
+        try:
+            _rate_limiter.acquire()
+            snap = krx_stock.get_market_ohlcv_by_ticker(target_date.replace("-", ""), market="ALL")
+            break
+        except Exception as e:
+            # 요청 제한/네트워크 오류는 일시적이므로 재시도, 소진되면 호출측에 전파
+            throttled = _is_throttle_error(e)
+            if throttled:
+                _rate_limiter.slow_down()
+            if throttled or isinstance(e, _TRANSIENT_ERRORS) or _is_network_error(e):
+                if attempt < max_retries - 1:
+                    time.sleep(2 * (attempt + 1))  # 점진적 대기
+                    continue
+                raise
+            print(f"[WARN] KRX snapshot failed ({target_date}): {e}")
+            return None
+    if snap is None or snap.empty or not set(_SNAPSHOT_COLUMNS) <= set(snap.columns):
+        return None
 
-    tickers = df_krx[["Code", "Name"]].values.tolist()
-    print(f">>> 총 {len(tickers)}개 종목 업데이트 시작 (병렬: {MAX_WORKERS}개)")
+    print(f">>> [{target_date}] KRX 전종목 스냅샷 사용 ({len(snap)}개)")
+    # 휴장일(또는 미집계)은 시/고/저/종가가 모두 0
+    if (snap[["시가", "고가", "저가", "종가"]] == 0).all(axis=None):
+        return pd.DataFrame()
+
+    out = snap[list(_SNAPSHOT_COLUMNS)].rename(columns=_SNAPSHOT_COLUMNS)
+    out = out.rename_axis("code").reset_index()
+    out["code"] = _zfill_codes(out["code"])
+    out["change"] = out["change"] / 100.0  # pykrx 등락률(%) -> FDR Change(비율)와 동일 단위
+    names = df_krx.drop_duplicates("Code").set_index("Code")["Name"]
+    out = out[out["code"].isin(names.index)]
+    out["name"] = out["code"].map(names)
+    # 거래정지 종목은 종가만 있고 시/고/저가가 0 -> 종목별 수집(FDR)과 같게 종가로 채움 (volume=0은 유지)
+    close = out["close"]
+    for col in ("open", "high", "low"):
+        out[col] = out[col].mask((out[col] == 0) & (close > 0), close)
+    out.insert(0, "date", pd.Timestamp(target_date))
+    return out
 
-    save_dir = os.path.join(DATA_DIR, f"date={target_date}")
-    save_path = os.path.join(save_dir, "part-0000.parquet")
-    ensure_dir(save_dir)
 
-    # 오늘 데이터 수집을 위해 최근 N일치 정도를 넉넉히 가져와서 필터링
-    start_date = (datetime.strptime(target_date, "%Y-%m-%d") - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
-    end_date = target_date
+def _collect_snapshots(
+    date_list: list[str],
+    df_krx: pd.DataFrame,
+    merge_existing: bool,
+) -> tuple[dict[str, str], list[str]]:
+    """날짜별 전종목 스냅샷을 병렬로 받아 바로 저장.
+
+    스냅샷은 요청 1회에 전 종목이 들어있으므로 백필 기간이 길어도 종목별 수집보다
+    요청 수가 훨씬 적다. 스냅샷을 아예 쓸 수 없으면(pykrx 미설치/로그인 실패 등) 나머지 날짜는
+    더 시도하지 않는다. 네트워크 오류는 해당 날짜만 종목별 수집으로 넘기고,
+    SNAPSHOT_MAX_CONSECUTIVE_FAILURES번 연속으로 실패할 때만 스냅샷을 포기한다.
+
+    Returns: ({date: 저장 경로}, 종목별 수집으로 넘길 날짜 목록)
+    """
+    unavailable = threading.Event()
+    failure_lock = threading.Lock()
+    consecutive_failures = 0
+
+    def _one(d: str) -> tuple[str, bool, str | None]:
+        nonlocal consecutive_failures
+        if unavailable.is_set():
+            return d, False, None
+        try:
+            snap = _fetch_bars_snapshot(d, df_krx)
+        except Exception as e:
+            print(f"[WARN] KRX snapshot failed after retries ({d}): {e}")
+            with failure_lock:
+                consecutive_failures += 1
+                if consecutive_failures >= SNAPSHOT_MAX_CONSECUTIVE_FAILURES:
+                    unavailable.set()
+            return d, False, None
+        if snap is None:
+            unavailable.set()
+            return d, False, None
+        with failure_lock:
+            consecutive_failures = 0
+        return d, True, _save_bars_partition(d, snap, df_krx, merge_existing)
+
+    saved: dict[str, str] = {}
+    fallback: list[str] = []
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(date_list))) as executor:
+        futures = [executor.submit(_one, d) for d in date_list]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Snapshots"):
+            d, ok, path = future.result()
+            if not ok:
+                fallback.append(d)
+            elif path:
+                saved[d] = path
+    return saved, sorted(fallback)
+
+
+def _fetch_bars_parallel(
+    df_krx: pd.DataFrame,
+    start_date: str,
+    end_date: str,
+    keep_dates: pd.DatetimeIndex | None = None,
+) -> pd.DataFrame:
+    """df_krx 종목들의 start..end 일봉을 병렬로 가져와 하나의 DataFrame으로 반환 (name 포함).
+
+    keep_dates를 주면 종목별 결과에서 해당 날짜 행만 남긴다 (lookback 구간 등은 바로 버림).
+    """
+    tickers = list(zip(df_krx["Code"].to_numpy(), df_krx["Name"].to_numpy()))
+    print(f">>> 총 {len(tickers)}개 종목 업데이트 시작 (병렬: {MAX_WORKERS}개, {start_date}~{end_date})")
 
-    today_results: list[pd.DataFrame] = []
+    fetched: list[pd.DataFrame] = []
+    names: list[str] = []
 
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         future_to_code = {
@@ -439,26 +793,38 @@ def update_data_parallel(
             res_df = future.result()
             if res_df is None or res_df.empty:
                 continue
+            if keep_dates is not None:
+                res_df = res_df[res_df["date"].dt.normalize().isin(keep_dates)]
+                if res_df.empty:
+                    continue
+            fetched.append(res_df)
+            names.append(future_to_code[future][1])
 
-            # 오늘 날짜 데이터만 필터링
-            res_df["date_str"] = res_df["date"].dt.strftime("%Y-%m-%d")
-            today_data = res_df[res_df["date_str"] == target_date].copy()
-            if today_data.empty:
-                continue
+    if not fetched:
+        return pd.DataFrame()
 
-            code = _zfill_code(today_data["code"].iloc[0])
-            name_val = future_to_code[future][1] if future in future_to_code else ""
-            today_data["code"] = code
-            today_data["name"] = name_val
-            today_data = today_data.drop(columns=["date_str"])
-            today_results.append(today_data)
+    # 종목별 결과를 한 번에 합치고, name은 종목별 복사(assign) 대신 합친 뒤 한 번에 채움
+    all_df = pd.concat(fetched, ignore_index=True)
+    all_df["name"] = np.repeat(np.asarray(names, dtype=object), [len(f) for f in fetched])
+    return all_df
 
-    if not today_results:
+
+def _save_bars_partition(
+    target_date: str,
+    new_df: pd.DataFrame,
+    df_krx: pd.DataFrame,
+    merge_existing: bool,
+) -> str | None:
+    """하루치 bars를 date=YYYY-MM-DD/part-0000.parquet로 저장 (merge 옵션 지원)."""
+    if new_df is None or new_df.empty:
         print(f"[{target_date}] 수집된 데이터가 없습니다. (휴장일이거나 데이터가 아직 업데이트되지 않았습니다.)")
         return None
 
-    print(">>> 데이터 병합 및 저장 중...")
-    new_df = pd.concat(today_results, ignore_index=True)
+    save_path = bars_partition_path(target_date)
+    save_dir = os.path.dirname(save_path)
+    ensure_dir(save_dir)
+
+    print(f">>> [{target_date}] 데이터 병합 및 저장 중...")
     # Validate schema before writing to parquet (prevents malformed partitions)
     try:
         new_df = _normalize_bars_df(new_df, df_krx=df_krx)
@@ -470,14 +836,11 @@ def update_data_parallel(
         try:
             old_df = pd.read_parquet(save_path)
             if not old_df.empty:
-                old_df = old_df.copy()
-                old_df["code"] = old_df["code"].apply(_zfill_code)
-                new_df["code"] = new_df["code"].apply(_zfill_code)
-
-                old_df = old_df.set_index("code")
-                new_df = new_df.set_index("code")
-                old_df.update(new_df)
-                merged = old_df.reset_index()
+                old_df["code"] = _zfill_codes(old_df["code"])  # new_df는 _normalize_bars_df에서 이미 처리됨
+                # code 기준 upsert: 새로 받은 종목 행이 기존 행을 대체하고, 없던 종목은 추가됨
+                merged = pd.concat([old_df, new_df], ignore_index=True).drop_duplicates(
+                    subset="code", keep="last"
+                )
                 merged = _normalize_bars_df(merged, df_krx=df_krx)
                 _atomic_to_parquet(merged, save_path)
                 print(f"✅ 저장 완료(merge): {save_path} (총 {len(merged)}개 종목)")
@@ -491,6 +854,182 @@ def update_data_parallel(
     return save_path
 
 
+_PARTITION_DIR_RE = re.compile(r"^date=(\d{4}-\d{2}-\d{2})$")
+
+
+def _list_partition_dates() -> set[str]:
+    """bars 디렉터리의 date=YYYY-MM-DD 파티션 날짜 집합 (scandir 한 번)"""
+    try:
+        with os.scandir(DATA_DIR) as it:
+            return {
+                m.group(1)
+                for entry in it
+                if entry.is_dir(follow_symlinks=False) and (m := _PARTITION_DIR_RE.match(entry.name))
+            }
+    except FileNotFoundError:
+        return set()
+
+
+def _prune_collected(date_list: list[str], df_krx: pd.DataFrame) -> tuple[list[str], pd.DataFrame]:
+    """이미 수집된 (날짜, 종목)을 요청 대상에서 제외.
+
+    - 대상 종목이 모두 들어있는 파티션의 날짜는 제외
+    - 남은 날짜들의 파티션 모두에 이미 있는 종목은 요청하지 않음
+    """
+    wanted = set(df_krx["Code"])
+    # 날짜마다 stat 하지 않고 디렉터리 한 번 스캔 후 집합 교집합으로 기존 파티션 후보 선별
+    on_disk = _list_partition_dates().intersection(date_list)
+    present: dict[str, set[str]] = {}
+    for d in sorted(on_disk):
+        path = bars_partition_path(d)
+        try:
+            present[d] = set(_zfill_codes(pd.read_parquet(path, columns=["code"])["code"]))
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            print(f"[WARN] Failed to read {path}: {e}")
+
+    pending = [d for d in date_list if not wanted <= present.get(d, set())]
+    if pending:
+        have_all = set.intersection(*(present.get(d, set()) for d in pending))
+        if have_all:
+            df_krx = df_krx[~df_krx["Code"].isin(have_all)]
+    return pending, df_krx
+
+
+def update_data_range_parallel(
+    date_list: list[str],
+    codes: list[str] | None = None,
+    merge_existing: bool = False,
+    lookback_days: int = 5,
+    skip_existing: bool = False,
+    use_snapshot: bool = False,
+) -> dict[str, str]:
+    """여러 날짜의 일봉을 종목당 1회 요청으로 수집하여 날짜별 parquet로 저장.
+
+    날짜마다 전 종목을 다시 요청하지 않고, 종목별로 (최초 날짜 - lookback) ~ 마지막 날짜
+    구간을 한 번에 가져온 뒤 날짜별로 나누어 저장한다.
+
+    use_snapshot=True: 날짜별 KRX 전종목 OHLCV 스냅샷(pykrx, 날짜당 1회 요청)을 먼저
+    시도하고, 스냅샷을 쓸 수 없는 날짜만 종목별 수집으로 처리한다.
+
+    skip_existing=True: 기존 파티션에 이미 있는 (날짜, 종목)은 요청하지 않고,
+    부족한 종목만 받아 기존 파티션에 merge 한다.
+
+    Returns: {date: 저장된 parquet 경로} (저장에 성공한 날짜만)
+    """
+    if not date_list:
+        return {}
+
+    try:
+        df_krx = _get_krx_listing()
+    except Exception as e:
+        print(f"Error fetching stock listing: {e}")
+        return {}
+
+    df_krx["Code"] = _zfill_codes(df_krx["Code"])
+    if codes:
+        df_krx = df_krx[df_krx["Code"].isin(_zfill_codes(pd.Series(codes, dtype=object)))].copy()
+
+    if skip_existing:
+        requested = len(date_list)
+        date_list, df_krx = _prune_collected(date_list, df_krx)
+        if not date_list:
+            print("[INFO] All requested dates already collected")
+            return {}
+        print(
+            f"[INFO] skip-existing: {len(date_list)}/{requested} date(s) incomplete, "
+            f"fetching {len(df_krx)} missing code(s)"
+        )
+        merge_existing = True
+
+    saved: dict[str, str] = {}
+    if use_snapshot:
+        saved, fallback = _collect_snapshots(date_list, df_krx, merge_existing)
+        if not fallback:
+            return saved
+        print(f"[INFO] Snapshot unavailable for {len(fallback)} date(s), falling back to per-ticker fetch")
+        date_list = fallback
+
+    # 긴 범위는 RANGE_CHUNK_DATES 단위로 받아서 바로 저장 (전체 백필을 메모리에 들고 있지 않음).
+    # 저장은 별도 writer 스레드에서 하여 다음 묶음의 네트워크 수집과 겹치게 한다
+    # (메모리에는 저장 중인 묶음 + 수집 중인 묶음, 최대 2개만 유지).
+    date_list = sorted(date_list)
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending_save = None
+        for i in range(0, len(date_list), RANGE_CHUNK_DATES):
+            chunk = date_list[i:i + RANGE_CHUNK_DATES]
+            by_date = _fetch_date_chunk(chunk, df_krx, lookback_days)
+            if pending_save is not None:
+                saved.update(pending_save.result())
+            pending_save = writer.submit(_save_date_chunk, chunk, by_date, df_krx, merge_existing)
+        if pending_save is not None:
+            saved.update(pending_save.result())
+    return saved
+
+
+def _fetch_date_chunk(
+    date_list: list[str],
+    df_krx: pd.DataFrame,
+    lookback_days: int,
+) -> dict[str, pd.DataFrame]:
+    """정렬된 날짜 묶음 하나를 종목당 1회 요청으로 수집하여 {date: DataFrame}으로 반환."""
+    # 대상 날짜 데이터 수집을 위해 최근 N일치 정도를 넉넉히 가져와서 필터링
+    first_date, last_date = date_list[0], date_list[-1]
+    start_date = (_parse_ymd(first_date) - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+    wanted = pd.DatetimeIndex(date_list)
+    all_df = _fetch_bars_parallel(df_krx, start_date, last_date, keep_dates=wanted)
+    if all_df.empty:
+        return {}
+
+    by_ts = dict(tuple(all_df.groupby(all_df["date"].dt.normalize(), sort=False)))
+    return {d: by_ts[ts] for d, ts in zip(date_list, wanted) if ts in by_ts}
+
+
+def _save_date_chunk(
+    date_list: list[str],
+    by_date: dict[str, pd.DataFrame],
+    df_krx: pd.DataFrame,
+    merge_existing: bool,
+) -> dict[str, str]:
+    """_fetch_date_chunk 결과를 날짜별 파티션으로 저장. Returns: {date: path}"""
+    saved: dict[str, str] = {}
+    for d in date_list:
+        path = _save_bars_partition(d, by_date.pop(d, None), df_krx, merge_existing)
+        if path:
+            saved[d] = path
+    return saved
+
+
+def update_data_parallel(
+    target_date: str | None = None,
+    codes: list[str] | None = None,
+    merge_existing: bool = False,
+    lookback_days: int = 5,
+) -> str | None:
+    """병렬 처리로 일봉(또는 장중 last) 데이터를 수집하여 parquet로 저장.
+
+    - codes=None: 전체 종목
+    - merge_existing=True: 기존 date 파티션이 있으면 code 단위로 업데이트
+
+    Returns: 저장된 parquet 경로 (성공), None (실패)
+    """
+    if target_date is None:
+        target_date = datetime.now().strftime("%Y-%m-%d")
+
+    saved = update_data_range_parallel(
+        [target_date], codes=codes, merge_existing=merge_existing, lookback_days=lookback_days
+    )
+    return saved.get(target_date)
+
+
+def _build_universe_partition(target_date: str, bars_path: str) -> pd.DataFrame:
+    """해당 날짜 유니버스를 만들어 날짜 파티션만 저장 (latest 갱신은 호출측)."""
+    uni = build_universe_cache_from_bars(target_date, bars_path)
+    save_universe_cache(target_date, uni, update_latest=False)
+    return uni
+
+
 def main():
     global MAX_WORKERS
 
@@ -525,7 +1064,7 @@ def main():
         "--workers",
         type=int,
         default=MAX_WORKERS,
-        help="병렬 워커 수 (기본: 8)",
+        help=f"병렬 워커 수 (기본: {MAX_WORKERS})",
     )
     parser.add_argument(
         "--merge",
@@ -548,6 +1087,11 @@ def main():
         default=None,
         help="YYYY-MM-DD: 기존 bars parquet가 깨졌을 때(code 누락) 복구 시도",
     )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="bars 파티션이 이미 있는 날짜는 수집 대상에서 제외 (범위 백필 재실행용)",
+    )
     args = parser.parse_args()
 
     MAX_WORKERS = args.workers
@@ -560,9 +1104,9 @@ def main():
     if args.start_date or args.end_date:
         if not (args.start_date and args.end_date):
             raise ValueError("Both --start-date and --end-date are required for range updates")
-        date_list = iter_dates_inclusive(args.start_date, args.end_date)
-        if not args.include_weekends:
-            date_list = [d for d in date_list if is_weekday(d)]
+        date_list = iter_dates_inclusive(
+            args.start_date, args.end_date, weekdays_only=not args.include_weekends
+        )
         if not date_list:
             print("[WARN] date range produced no dates after filtering")
             return
@@ -588,46 +1132,59 @@ def main():
             if filtered_count > 0:
                 print(f"[INFO] Filtered out {filtered_count} suspended stocks (volume=0 in last 3 days)")
 
-        for d in date_list:
-            print("=" * 70)
-            print(f"[INTRADAY] Updating universe for {d} ({len(codes)} codes)")
-            print("=" * 70)
-            saved_path = update_data_parallel(
-                target_date=d,
-                codes=codes,
-                merge_existing=(False if args.overwrite else True),
-                lookback_days=args.lookback_days,
-            )
-            if saved_path:
-                print(f"[INFO] Intraday update done: {saved_path}")
-        return
-
-    # EOD: 전체 수집
-    last_success_date: str | None = None
-    last_success_path: str | None = None
-    for d in date_list:
         print("=" * 70)
-        print(f"[EOD] Updating all tickers for {d}")
+        print(f"[INTRADAY] Updating universe for {_format_date_span(date_list)} ({len(codes)} codes)")
         print("=" * 70)
-        saved_path = update_data_parallel(
-            target_date=d,
-            codes=None,
-            merge_existing=(False if args.overwrite else args.merge),
+        saved = update_data_range_parallel(
+            date_list,
+            codes=codes,
+            merge_existing=(False if args.overwrite else True),
             lookback_days=args.lookback_days,
+            skip_existing=args.skip_existing,
         )
-        if not saved_path:
-            continue
+        for saved_path in saved.values():
+            print(f"[INFO] Intraday update done: {saved_path}")
+        return
 
-        last_success_date = d
-        last_success_path = saved_path
+    # EOD: 전체 수집
+    last_success_date: str | None = None
+    last_success_path: str | None = None
+    print("=" * 70)
+    print(f"[EOD] Updating all tickers for {_format_date_span(date_list)}")
+    print("=" * 70)
+    saved = update_data_range_parallel(
+        date_list,
+        codes=None,
+        merge_existing=(False if args.overwrite else args.merge),
+        lookback_days=args.lookback_days,
+        skip_existing=args.skip_existing,
+        use_snapshot=True,
+    )
+    done = [d for d in date_list if d in saved]
+    if done:
+        last_success_date = done[-1]
+        last_success_path = saved[last_success_date]
+
+        # EOD 종료 후 유니버스 캐시 생성 (날짜별로 독립적이므로 동시에 생성,
+        # latest/JSON은 마지막으로 성공한 날짜 기준으로 한 번만 갱신)
+        built: dict[str, pd.DataFrame] = {}
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(done))) as executor:
+            future_to_date = {
+                executor.submit(_build_universe_partition, d, saved[d]): d for d in done
+            }
+            for future in as_completed(future_to_date):
+                d = future_to_date[future]
+                try:
+                    built[d] = future.result()
+                except Exception as e:
+                    print(f"[WARN] universe cache build failed ({d}): {e}")
+                    continue
+                print(f"✅ 유니버스 캐시 생성 완료: {UNIVERSE_DIR} ({d}, 총 {len(built[d])}개)")
 
-        # EOD 종료 후 유니버스 캐시 생성 (해당 날짜 기준)
-        try:
-            uni = build_universe_cache_from_bars(d, saved_path)
-            save_universe_cache(d, uni)
-            print(f"✅ 유니버스 캐시 생성 완료: {UNIVERSE_DIR} (총 {len(uni)}개)")
-        except Exception as e:
-            print(f"[WARN] universe cache build failed ({d}): {e}")
+        if built:
+            latest = max(built)
+            dated_path = os.path.join(UNIVERSE_DIR, f"date={latest}", "part-0000.parquet")
+            _publish_latest_universe(latest, built[latest], dated_path)
 
     if last_success_date is None:
         print("[WARN] No successful EOD updates in the requested date list")
@@ -2,7 +2,12 @@ import os
 import requests
 import json
 import time
+import threading
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # .env 파일 로드
 load_dotenv()
@@ -13,71 +18,115 @@ APP_SECRET = os.getenv("KIS_REAL_APP_SECRET")
 BASE_URL = "https://openapi.koreainvestment.com:9443"
 TOKEN_FILE = "kis_token_real.json"
 
+# 공용 세션 (keep-alive로 호출마다 TCP/TLS 연결을 새로 맺지 않음)
+# 공통 헤더는 세션에, 호출별 헤더(authorization, tr_id 등)만 각 요청에 전달
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "Content-Type": "application/json",
+    "appkey": APP_KEY or "",
+    "appsecret": APP_SECRET or "",
+})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False),  # 재시도 소진 시 예외 대신 마지막 응답 반환
+))
+
+# 등락률 순위 조회 고정 파라미터 (호출마다 dict를 새로 만들지 않음)
+_FLUCTUATION_PARAMS = MappingProxyType({
+    "fid_cond_mrkt_div_code": "J",
+    "fid_cond_scr_div_code": "20171",
+    "fid_input_iscd": "0000",
+    "fid_rank_sort_cls_code": "0",
+    "fid_input_cnt_1": "0",
+    "fid_prc_cls_code": "1",
+    "fid_input_price_1": "",
+    "fid_input_price_2": "",
+    "fid_vol_cnt": "",
+    "fid_trgt_cls_code": "0",
+    "fid_trgt_exls_cls_code": "0",
+    "fid_div_cls_code": "0",
+    "fid_rsfl_cls_code": "1"
+})
+
+# 거래량 순위 조회 고정 파라미터
+_VOLUME_PARAMS = MappingProxyType({
+    "fid_cond_mrkt_div_code": "J",
+    "fid_cond_scr_div_code": "20171",
+    "fid_input_iscd": "0000",
+    "fid_rank_sort_cls_code": "0",
+    "fid_input_cnt_1": "0",
+    "fid_prc_cls_code": "1",
+    "fid_input_price_1": "",
+    "fid_input_price_2": "",
+    "fid_vol_cnt": "",
+    "fid_trgt_cls_code": "0",
+    "fid_trgt_exls_cls_code": "0",
+    "fid_div_cls_code": "0",
+    "fid_rsfl_cls_code": "0"
+})
+
+# 프로세스 내 토큰 캐시 (호출마다 토큰 파일을 다시 읽지 않음)
+_TOKEN_CACHE = {"token": None, "expiry": 0.0}
+_TOKEN_LOCK = threading.Lock()
+
 def get_access_token():
-    """접근 토큰 발급 (캐싱 포함)"""
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'r') as f:
-            try:
-                token_data = json.load(f)
-                if token_data.get('expiry', 0) > time.time():
-                    print("[Access Token] 캐시된 토큰 사용")
-                    return token_data.get('access_token')
-            except:
-                pass
-
-    url = f"{BASE_URL}/oauth2/tokenP"
-    payload = {
-        "grant_type": "client_credentials",
-        "appkey": APP_KEY,
-        "appsecret": APP_SECRET
-    }
-    res = requests.post(url, data=json.dumps(payload))
-    print(f"[Access Token] HTTP Status: {res.status_code}")
-    res_data = res.json()
-    if 'access_token' in res_data:
-        print(f"[Access Token] 발급 성공")
-        # 토큰 유효 기간 저장 (보통 24시간이나 안전하게 12시간으로 설정)
-        token_data = {
-            'access_token': res_data['access_token'],
-            'expiry': time.time() + 12 * 3600
+    """접근 토큰 발급 (캐싱 포함: 메모리 -> 토큰 파일 -> 신규 발급)"""
+    if _TOKEN_CACHE['token'] and _TOKEN_CACHE['expiry'] > time.time():
+        return _TOKEN_CACHE['token']
+
+    # 여러 스레드가 동시에 만료를 감지해도 파일 읽기/발급은 한 번만
+    with _TOKEN_LOCK:
+        if _TOKEN_CACHE['token'] and _TOKEN_CACHE['expiry'] > time.time():
+            return _TOKEN_CACHE['token']
+
+        if os.path.exists(TOKEN_FILE):
+            with open(TOKEN_FILE, 'r') as f:
+                try:
+                    token_data = json.load(f)
+                    if token_data.get('expiry', 0) > time.time():
+                        print("[Access Token] 캐시된 토큰 사용")
+                        _TOKEN_CACHE.update(token=token_data.get('access_token'), expiry=token_data['expiry'])
+                        return token_data.get('access_token')
+                except:
+                    pass
+
+        url = f"{BASE_URL}/oauth2/tokenP"
+        payload = {
+            "grant_type": "client_credentials",
+            "appkey": APP_KEY,
+            "appsecret": APP_SECRET
         }
-        with open(TOKEN_FILE, 'w') as f:
-            json.dump(token_data, f)
+        res = _SESSION.post(url, data=json.dumps(payload))
+        print(f"[Access Token] HTTP Status: {res.status_code}")
+        res_data = res.json()
+        if 'access_token' in res_data:
+            print(f"[Access Token] 발급 성공")
+            # 토큰 유효 기간 저장 (보통 24시간이나 안전하게 12시간으로 설정)
+            token_data = {
+                'access_token': res_data['access_token'],
+                'expiry': time.time() + 12 * 3600
+            }
+            with open(TOKEN_FILE, 'w') as f:
+                json.dump(token_data, f)
+            _TOKEN_CACHE.update(token=token_data['access_token'], expiry=token_data['expiry'])
+            return res_data.get('access_token')
+        else:
+            print(f"[Access Token] 실패 - Code: {res_data.get('error_code')}, Message: {res_data.get('error_description')}")
         return res_data.get('access_token')
-    else:
-        print(f"[Access Token] 실패 - Code: {res_data.get('error_code')}, Message: {res_data.get('error_description')}")
-    return res_data.get('access_token')
 
 def get_fluctuation_ranking(access_token):
     """국내주식 등락률 순위 조회"""
     url = f"{BASE_URL}/uapi/domestic-stock/v1/ranking/fluctuation"
     
     headers = {
-        "Content-Type": "application/json",
         "authorization": f"Bearer {access_token}",
-        "appkey": APP_KEY,
-        "appsecret": APP_SECRET,
         "tr_id": "FHPST01700000",
         "custtype": "P",
     }
     
-    params = {
-        "fid_cond_mrkt_div_code": "J",
-        "fid_cond_scr_div_code": "20171",
-        "fid_input_iscd": "0000",
-        "fid_rank_sort_cls_code": "0",
-        "fid_input_cnt_1": "0",
-        "fid_prc_cls_code": "1",
-        "fid_input_price_1": "",
-        "fid_input_price_2": "",
-        "fid_vol_cnt": "",
-        "fid_trgt_cls_code": "0",
-        "fid_trgt_exls_cls_code": "0",
-        "fid_div_cls_code": "0",
-        "fid_rsfl_cls_code": "1"
-    }
-    
-    res = requests.get(url, headers=headers, params=params)
+    res = _SESSION.get(url, headers=headers, params=_FLUCTUATION_PARAMS)
     print(f"[Fluctuation Ranking] HTTP Status: {res.status_code}")
     print(f"[Fluctuation Ranking] Full Response: {res.text}")
     
@@ -93,45 +142,24 @@ def get_current_price(access_token, symbol="005930"):
     """삼성전자 현재가 조회 (테스트용)"""
     url = f"{BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-price"
     headers = {
-        "Content-Type": "application/json",
         "authorization": f"Bearer {access_token}",
-        "appkey": APP_KEY,
-        "appsecret": APP_SECRET,
         "tr_id": "FHKST01010100", # 현재가 조회용 실전투자 TR ID
     }
     params = {
         "fid_cond_mrkt_div_code": "J",
         "fid_input_iscd": symbol
     }
-    res = requests.get(url, headers=headers, params=params)
+    res = _SESSION.get(url, headers=headers, params=params)
     return res.json()
 
 def get_volume_ranking(access_token):
     """국내주식 거래량 순위 조회 (테스트용)"""
     url = f"{BASE_URL}/uapi/domestic-stock/v1/ranking/volume"
     headers = {
-        "Content-Type": "application/json",
         "authorization": f"Bearer {access_token}",
-        "appkey": APP_KEY,
-        "appsecret": APP_SECRET,
         "tr_id": "FHPST01710000",
     }
-    params = {
-        "fid_cond_mrkt_div_code": "J",
-        "fid_cond_scr_div_code": "20171",
-        "fid_input_iscd": "0000",
-        "fid_rank_sort_cls_code": "0",
-        "fid_input_cnt_1": "0",
-        "fid_prc_cls_code": "1",
-        "fid_input_price_1": "",
-        "fid_input_price_2": "",
-        "fid_vol_cnt": "",
-        "fid_trgt_cls_code": "0",
-        "fid_trgt_exls_cls_code": "0",
-        "fid_div_cls_code": "0",
-        "fid_rsfl_cls_code": "0"
-    }
-    res = requests.get(url, headers=headers, params=params)
+    res = _SESSION.get(url, headers=headers, params=_VOLUME_PARAMS)
     try:
         return res.json()
     except:
@@ -145,17 +173,21 @@ if __name__ == "__main__":
         print("토큰 발급 실패")
     else:
         print("토큰 발급 성공")
-        
+
+        # 세 조회는 서로 독립이므로 동시에 요청하고, 결과는 순서대로 출력
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            f_price = executor.submit(get_current_price, token)
+            f_fluc = executor.submit(get_fluctuation_ranking, token)
+            f_vol = executor.submit(get_volume_ranking, token)
+            price_data, result, vol_result = f_price.result(), f_fluc.result(), f_vol.result()
+
         print("\n1. 현재가 조회 테스트 (삼성전자 005930)")
-        price_data = get_current_price(token)
         print(f"rt_cd: {price_data.get('rt_cd')}, msg_cd: {price_data.get('msg_cd')}, msg1: {price_data.get('msg1')}")
         
         print("\n2. 등락률 순위 조회 테스트")
-        result = get_fluctuation_ranking(token)
         print(f"rt_cd: '{result.get('rt_cd')}', msg_cd: '{result.get('msg_cd')}', msg1: '{result.get('msg1')}'")
         
         print("\n3. 거래량 순위 조회 테스트")
-        vol_result = get_volume_ranking(token)
         print(f"rt_cd: '{vol_result.get('rt_cd')}', msg_cd: '{vol_result.get('msg_cd')}', msg1: '{vol_result.get('msg1')}'")
         
         if result and result.get('rt_cd') == '0':
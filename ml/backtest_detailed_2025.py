@@ -1,4 +1,5 @@
 
+import csv
 import pandas as pd
 import numpy as np
 import os
@@ -8,6 +9,10 @@ from ml.config import CFG
 from ml.data_pipeline import prepare_train_test_data, get_feature_columns
 from ml.evaluate import load_latest_model, predict_with_probability
 
+REPORT_FIELDS = [
+    'Date', 'Stock_Code', 'Stock_Name', 'Buy_Price', 'Sell_Price', 'Return', 'Daily_Return', 'Total_Assets',
+]
+
 def generate_detailed_backtest_report(start_assets=1_000_000, min_prob=0.8, top_k=5):
     print("=" * 60)
     print(f"Generating Detailed Backtest Report (2025)")
@@ -16,7 +21,9 @@ def generate_detailed_backtest_report(start_assets=1_000_000, min_prob=0.8, top_
     print("=" * 60)
 
     # 1. Load Data & Model
-    _, test_df = prepare_train_test_data()
+    # Only the 2025 test split and the columns the simulation uses are loaded
+    feature_cols = get_feature_columns()
+    _, test_df = prepare_train_test_data(columns=['date', 'code', 'close', 'next_return'] + feature_cols, include_train=False)
     model, model_path = load_latest_model()
     
     # Stock name mapping
@@ -38,72 +45,84 @@ def generate_detailed_backtest_report(start_assets=1_000_000, min_prob=0.8, top_
         print("[WARN] No 2025 data found. Using last 250 days instead.")
         dates_2025 = dates[-251:] 
 
-    feature_cols = get_feature_columns()
     current_assets = start_assets
-    report_data = []
 
-    for i, date in enumerate(tqdm(dates_2025[:-1], desc="Simulating 2025")):
-        day_data = test_df[test_df['date_str'] == date].copy()
-        if len(day_data) == 0: continue
+    # Predict all simulated days in one call (instead of once per day)
+    sim_dates = dates_2025[:-1]
+    sim_df = test_df[test_df['date_str'].isin(sim_dates)]
+    if len(sim_df) > 0:
+        positive_proba, expected_return = predict_with_probability(model, sim_df[feature_cols].values)
+    else:
+        positive_proba, expected_return = np.empty(0), np.empty(0)
+    sim_df = sim_df.assign(prob=positive_proba, expected_return=expected_return)
+    sim_days = set(sim_df['date_str'].unique())
 
-        # Predict
-        X = day_data[feature_cols].values
-        positive_proba, expected_return = predict_with_probability(model, X)
-        
-        day_data['prob'] = positive_proba
-        day_data['expected_return'] = expected_return
-        
-        # Filter and Select
-        candidates = day_data[day_data['prob'] >= min_prob]
-        if len(candidates) == 0:
-            # No trades today
-            report_data.append({
-                'Date': date,
-                'Stock_Code': 'CASH',
-                'Stock_Name': '현금보유',
-                'Buy_Price': 0,
-                'Sell_Price': 0,
-                'Return': 0.0,
-                'Daily_Return': 0.0,
-                'Total_Assets': current_assets
-            })
-            continue
+    # Select every day's Top-K in one pass; the daily loop below only compounds and logs.
+    # (stable sort keeps nlargest's tie order: the first occurrence wins)
+    picks = (
+        sim_df[sim_df['prob'] >= min_prob]
+        .sort_values(['date_str', 'expected_return'], ascending=[True, False], kind='stable')
+        .groupby('date_str', sort=False)
+        .head(top_k)
+    )
+    # picks는 날짜순이므로 매일 이진 탐색으로 해당 날짜 구간만 잘라냄
+    pick_keys = picks['date_str'].to_numpy()
+
+    # Stream report rows straight to CSV (no intermediate list/DataFrame)
+    os.makedirs('ml/results', exist_ok=True)
+    report_path = 'ml/results/backtest_2025_detailed.csv'
+    with open(report_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+
+        for i, date in enumerate(tqdm(sim_dates, desc="Simulating 2025")):
+            if date not in sim_days: continue
+
+            # Selected stocks of the day
+            lo, hi = np.searchsorted(pick_keys, date, 'left'), np.searchsorted(pick_keys, date, 'right')
+            if lo == hi:
+                # No trades today
+                writer.writerow({
+                    'Date': date,
+                    'Stock_Code': 'CASH',
+                    'Stock_Name': '현금보유',
+                    'Buy_Price': 0,
+                    'Sell_Price': 0,
+                    'Return': 0.0,
+                    'Daily_Return': 0.0,
+                    'Total_Assets': current_assets
+                })
+                continue
             
-        top_stocks = candidates.nlargest(min(top_k, len(candidates)), 'expected_return')
+            top_stocks = picks.iloc[lo:hi]
         
-        # Calculate daily return
-        actual_returns = top_stocks['next_return'].values
-        daily_return = np.mean(actual_returns)
+            # Calculate daily return
+            actual_returns = top_stocks['next_return'].values
+            daily_return = np.mean(actual_returns)
         
-        # Update assets
-        prev_assets = current_assets
-        current_assets = prev_assets * (1 + daily_return)
+            # Update assets
+            prev_assets = current_assets
+            current_assets = prev_assets * (1 + daily_return)
         
-        # Log each stock in selection
-        for _, row in top_stocks.iterrows():
-            code = row['code']
-            name = code_to_name.get(code, code)
-            buy_price = row['close']
-            # next_return = (next_close / close) - 1 => next_close = close * (1 + next_return)
-            sell_price = buy_price * (1 + row['next_return'])
+            # Log each stock in selection
+            for _, row in top_stocks.iterrows():
+                code = row['code']
+                name = code_to_name.get(code, code)
+                buy_price = row['close']
+                # next_return = (next_close / close) - 1 => next_close = close * (1 + next_return)
+                sell_price = buy_price * (1 + row['next_return'])
             
-            report_data.append({
-                'Date': date,
-                'Stock_Code': f"'{code}", # Excel safety
-                'Stock_Name': name,
-                'Buy_Price': int(buy_price),
-                'Sell_Price': int(sell_price),
-                'Return': round(row['next_return'], 4),
-                'Daily_Return': round(daily_return, 4),
-                'Total_Assets': int(current_assets)
-            })
+                writer.writerow({
+                    'Date': date,
+                    'Stock_Code': f"'{code}", # Excel safety
+                    'Stock_Name': name,
+                    'Buy_Price': int(buy_price),
+                    'Sell_Price': int(sell_price),
+                    'Return': round(row['next_return'], 4),
+                    'Daily_Return': round(daily_return, 4),
+                    'Total_Assets': int(current_assets)
+                })
 
-    # Save to CSV
-    report_df = pd.DataFrame(report_data)
-    os.makedirs('ml/results', exist_ok=True)
-    report_path = 'ml/results/backtest_2025_detailed.csv'
-    report_df.to_csv(report_path, index=False, encoding='utf-8-sig')
-    
     print(f"\n[SUCCESS] Detailed report saved to: {report_path}")
     print(f"Final Assets: {current_assets:,.0f} KRW")
     return report_path
@@ -1,4 +1,5 @@
 
+import csv
 import pandas as pd
 import numpy as np
 import os
@@ -7,6 +8,10 @@ from ml.config import MLConfig
 from ml.data_pipeline import prepare_train_test_data, get_feature_columns
 from ml.evaluate import load_latest_model, predict_with_probability
 
+REPORT_FIELDS = [
+    'Date', 'Stock_Code', 'Stock_Name', 'Prediction_Strength', 'Buy_Price', 'Sell_Price', 'Return', 'Daily_Return', 'Market_Cap', 'Total_Assets',
+]
+
 def generate_marketcap_backtest_report(start_assets=1_000_000, min_prob=0.8, top_k=5, min_market_cap=50_000_000_000):
     CFG = MLConfig()
     print("=" * 60)
@@ -17,21 +22,28 @@ def generate_marketcap_backtest_report(start_assets=1_000_000, min_prob=0.8, top
     print("=" * 60)
 
     # 1. Load Data & Model
-    _, test_df = prepare_train_test_data()
+    # Only the 2025 test split and the columns the simulation uses are loaded
+    feature_cols = get_feature_columns()
+    _, test_df = prepare_train_test_data(columns=['date', 'code', 'open', 'close', 'next_return'] + feature_cols, include_train=False)
     model, model_path = load_latest_model()
     
     # 2. Stock Info (Name & Share Count)
     try:
         stocks_info = pd.read_csv('public/korea_stocks.csv')
-        stocks_info['단축코드'] = stocks_info['단축코드'].apply(lambda x: str(x).zfill(6))
+        stocks_info['단축코드'] = stocks_info['단축코드'].astype(str).str.zfill(6)
         code_to_name = dict(zip(stocks_info['단축코드'], stocks_info['한글 종목약명']))
-        code_to_shares = dict(zip(stocks_info['단축코드'], stocks_info['상장주식수']))
+        share_info = (
+            stocks_info[['단축코드', '상장주식수']]
+            .rename(columns={'단축코드': 'code', '상장주식수': 'shares'})
+            .drop_duplicates('code', keep='last')
+        )
     except Exception as e:
         print(f"[ERROR] Failed to load stock info: {e}")
         return
 
-    # Add share count to test_df for filtering
-    test_df['shares'] = test_df['code'].map(code_to_shares).fillna(0)
+    # Add share count to test_df for filtering (hash join instead of a per-row dict lookup)
+    test_df = test_df.merge(share_info, on='code', how='left')
+    test_df['shares'] = test_df['shares'].fillna(0)
     test_df['market_cap'] = test_df['close'] * test_df['shares']
 
     # Filter for 2025
@@ -43,79 +55,81 @@ def generate_marketcap_backtest_report(start_assets=1_000_000, min_prob=0.8, top
         print("[WARN] No 2025 data found. Using last available data.")
         dates_2025 = dates[-251:] 
 
-    feature_cols = get_feature_columns()
     current_assets = start_assets
-    report_data = []
 
-    for i, date in enumerate(tqdm(dates_2025[:-1], desc="Simulating 2025 (Cap > 50B)")):
-        day_data = test_df[test_df['date_str'] == date].copy()
-        if len(day_data) == 0: continue
+    # Apply Filters BEFORE selection (for all simulated days at once):
+    # 1. Market Cap >= 50B
+    # 2. Daily Price Change from Open > -5% (Avoid "Falling Knives" or Data Errors)
+    sim_dates = dates_2025[:-1]
+    sim_df = test_df[test_df['date_str'].isin(sim_dates)]
+    sim_df = sim_df.assign(change_from_open=(sim_df['close'] - sim_df['open']) / sim_df['open'])
+    sim_df = sim_df[
+        (sim_df['market_cap'] >= min_market_cap) & 
+        (sim_df['change_from_open'] > -0.05)
+    ]
 
-        # Apply Filters BEFORE selection:
-        # 1. Market Cap >= 50B
-        # 2. Daily Price Change from Open > -5% (Avoid "Falling Knives" or Data Errors)
-        day_data['change_from_open'] = (day_data['close'] - day_data['open']) / day_data['open']
-        day_data = day_data[
-            (day_data['market_cap'] >= min_market_cap) & 
-            (day_data['change_from_open'] > -0.05)
-        ]
+    # Predict all filtered rows in one call (instead of once per day)
+    if len(sim_df) > 0:
+        positive_proba, expected_return = predict_with_probability(model, sim_df[feature_cols].values)
+    else:
+        positive_proba, expected_return = np.empty(0), np.empty(0)
+    sim_df = sim_df.assign(prob=positive_proba, expected_return=expected_return)
 
-        if len(day_data) == 0:
-            report_data.append({
-                'Date': date, 'Stock_Code': 'CASH', 'Stock_Name': '현금보유',
-                'Buy_Price': 0, 'Sell_Price': 0, 'Return': 0.0, 'Daily_Return': 0.0, 'Total_Assets': current_assets
-            })
-            continue
+    # Filter Probability and select every day's Top-K in one pass; the daily loop below only compounds and logs.
+    # (stable sort keeps nlargest's tie order: the first occurrence wins)
+    picks = (
+        sim_df[sim_df['prob'] >= min_prob]
+        .sort_values(['date_str', 'expected_return'], ascending=[True, False], kind='stable')
+        .groupby('date_str', sort=False)
+        .head(top_k)
+    )
+    # picks는 날짜순이므로 매일 이진 탐색으로 해당 날짜 구간만 잘라냄
+    pick_keys = picks['date_str'].to_numpy()
 
-        # Predict
-        X = day_data[feature_cols].values
-        positive_proba, expected_return = predict_with_probability(model, X)
-        
-        day_data['prob'] = positive_proba
-        day_data['expected_return'] = expected_return
-        
-        # Filter Probability and Select Top K
-        candidates = day_data[day_data['prob'] >= min_prob]
-        if len(candidates) == 0:
-            report_data.append({
-                'Date': date, 'Stock_Code': 'CASH', 'Stock_Name': '현금보유',
-                'Buy_Price': 0, 'Sell_Price': 0, 'Return': 0.0, 'Daily_Return': 0.0, 'Total_Assets': current_assets
-            })
-            continue
+    # Stream report rows straight to CSV (no intermediate list/DataFrame)
+    os.makedirs('ml/results', exist_ok=True)
+    report_path = 'ml/results/backtest_2025_filtered_final.csv'
+    with open(report_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+
+        for i, date in enumerate(tqdm(sim_dates, desc="Simulating 2025 (Cap > 50B)")):
+            # No stock left after the filters / probability threshold -> cash
+            lo, hi = np.searchsorted(pick_keys, date, 'left'), np.searchsorted(pick_keys, date, 'right')
+            if lo == hi:
+                writer.writerow({
+                    'Date': date, 'Stock_Code': 'CASH', 'Stock_Name': '현금보유',
+                    'Buy_Price': 0, 'Sell_Price': 0, 'Return': 0.0, 'Daily_Return': 0.0, 'Total_Assets': current_assets
+                })
+                continue
             
-        top_stocks = candidates.nlargest(min(top_k, len(candidates)), 'expected_return')
+            top_stocks = picks.iloc[lo:hi]
         
-        # Calculate daily return (1/N)
-        actual_returns = top_stocks['next_return'].values
-        daily_return = np.mean(actual_returns)
+            # Calculate daily return (1/N)
+            actual_returns = top_stocks['next_return'].values
+            daily_return = np.mean(actual_returns)
         
-        # Update assets
-        prev_assets = current_assets
-        current_assets = prev_assets * (1 + daily_return)
+            # Update assets
+            prev_assets = current_assets
+            current_assets = prev_assets * (1 + daily_return)
         
-        # Log details
-        for _, row in top_stocks.iterrows():
-            code = row['code']
-            name = code_to_name.get(code, code)
-            report_data.append({
-                'Date': date,
-                'Stock_Code': f"'{code}",
-                'Stock_Name': name,
-                'Prediction_Strength': f"{row['prob']*100:.1f}%",
-                'Buy_Price': int(row['close']),
-                'Sell_Price': int(row['close'] * (1 + row['next_return'])),
-                'Return': round(row['next_return'], 4),
-                'Daily_Return': round(daily_return, 4),
-                'Market_Cap': int(row['market_cap']),
-                'Total_Assets': int(current_assets)
-            })
+            # Log details
+            for _, row in top_stocks.iterrows():
+                code = row['code']
+                name = code_to_name.get(code, code)
+                writer.writerow({
+                    'Date': date,
+                    'Stock_Code': f"'{code}",
+                    'Stock_Name': name,
+                    'Prediction_Strength': f"{row['prob']*100:.1f}%",
+                    'Buy_Price': int(row['close']),
+                    'Sell_Price': int(row['close'] * (1 + row['next_return'])),
+                    'Return': round(row['next_return'], 4),
+                    'Daily_Return': round(daily_return, 4),
+                    'Market_Cap': int(row['market_cap']),
+                    'Total_Assets': int(current_assets)
+                })
 
-    # Save to CSV
-    report_df = pd.DataFrame(report_data)
-    os.makedirs('ml/results', exist_ok=True)
-    report_path = 'ml/results/backtest_2025_filtered_final.csv'
-    report_df.to_csv(report_path, index=False, encoding='utf-8-sig')
-    
     print(f"\n[SUCCESS] Report saved to: {report_path}")
     print(f"Final Assets: {current_assets:,.0f} KRW")
     return report_path
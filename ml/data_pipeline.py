@@ -5,23 +5,35 @@ Data Pipeline - 데이터 로딩 및 피처 엔지니어링
 import os
 import warnings
 from typing import Tuple, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
+import pyarrow as pa
+import pyarrow.dataset as ds
 
 from ml.config import CFG
 
 warnings.filterwarnings('ignore')
 
 
+# 파티션마다 타입이 조금씩 다를 수 있으므로(date 문자열/timestamp, 가격 int/float) 읽을 때 통일
+_BARS_SCHEMA = pa.schema([
+    ('date', pa.timestamp('ns')),
+    ('code', pa.string()),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('volume', pa.float64()),
+    ('value', pa.float64()),
+])
+
+
 def load_all_bars(start_date: str, end_date: str) -> pd.DataFrame:
     """
     지정된 기간의 모든 일봉 데이터를 로드
     """
     bars_dir = CFG.bars_dir
-    all_data = []
     
     # 날짜 파티션 목록
     partitions = sorted([
@@ -30,24 +42,23 @@ def load_all_bars(start_date: str, end_date: str) -> pd.DataFrame:
     ])
     
     # 날짜 필터링
-    filtered = []
+    paths = []
     for p in partitions:
         date_str = p.replace('date=', '')
         if start_date <= date_str <= end_date:
-            filtered.append(p)
+            path = os.path.join(bars_dir, p, 'part-0000.parquet')
+            if os.path.exists(path):
+                paths.append(path)
     
-    print(f"[INFO] Loading {len(filtered)} trading days from {start_date} to {end_date}...")
+    print(f"[INFO] Loading {len(paths)} trading days from {start_date} to {end_date}...")
     
-    for partition in tqdm(filtered, desc="Loading data"):
-        path = os.path.join(bars_dir, partition, 'part-0000.parquet')
-        if os.path.exists(path):
-            df = pd.read_parquet(path)
-            all_data.append(df)
-    
-    if not all_data:
+    if not paths:
         raise ValueError("No data found for the specified period")
     
-    result = pd.concat(all_data, ignore_index=True)
+    # pyarrow dataset으로 한 번에 읽기 (Arrow 스레드 풀에서 병렬 디코딩, 필요한 컬럼만)
+    # 파일에 없는 컬럼(예: value)은 null로 채워짐
+    table = ds.dataset(paths, schema=_BARS_SCHEMA, format='parquet').to_table()
+    result = table.to_pandas()
     
     # 데이터 타입 최적화
     result['date'] = pd.to_datetime(result['date'])
@@ -60,86 +71,136 @@ def load_all_bars(start_date: str, end_date: str) -> pd.DataFrame:
     return result
 
 
-def compute_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
+def _rolling(s: pd.Series, keys: pd.Series, window: int, how: str = 'mean', min_periods: Optional[int] = None) -> pd.Series:
+    """종목별 rolling 집계 (원래 인덱스로 정렬된 결과)"""
+    r = s.groupby(keys, sort=False).rolling(window=window, min_periods=min_periods)
+    return getattr(r, how)().reset_index(level=0, drop=True)
+
+
+def _ewm_mean(s: pd.Series, keys: pd.Series, span: int) -> pd.Series:
+    """종목별 EMA (원래 인덱스로 정렬된 결과)"""
+    return s.groupby(keys, sort=False).ewm(span=span, adjust=False).mean().reset_index(level=0, drop=True)
+
+
+def _group_positions(codes: np.ndarray) -> np.ndarray:
+    """종목별로 연속 정렬된 code 배열에서 각 행의 종목 내 순번 (0부터)"""
+    n = len(codes)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+
+def _rolling_mean_sorted(s: pd.Series, pos: np.ndarray, window: int) -> pd.Series:
     """
-    종목별로 기술적 지표 계산
-    입력: 단일 종목의 시계열 데이터 (date 정렬됨)
+    종목별 rolling(window).mean()을 누적합 차분으로 계산 (groupby 없이 배열 연산 한 번)
+    s는 종목별로 연속 정렬되어 있어야 하며, 창 안에 NaN이 있으면 NaN (pandas와 동일)
+    """
+    v = s.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(v)
+    sums = np.r_[0.0, np.cumsum(np.where(valid, v, 0.0))]
+    counts = np.r_[0, np.cumsum(valid)]
+    out = np.full(len(v), np.nan)
+    if len(v) >= window:
+        win_sum = sums[window:] - sums[:-window]
+        win_cnt = counts[window:] - counts[:-window]
+        out[window - 1:] = np.where(win_cnt == window, win_sum / window, np.nan)
+    # 창이 이전 종목에 걸치는 구간
+    out[pos < window - 1] = np.nan
+    return pd.Series(out, index=s.index)
+
+
+def compute_indicators_panel(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    전 종목 패널에 대해 기술적 지표를 한 번에 계산 (종목별 groupby 연산)
+    입력: code, date 순으로 정렬된 데이터 (인덱스 중복 없음), 단일 종목도 가능
     """
     df = df.copy()
+    keys = df['code']
+    g = df.groupby('code', sort=False)
     close = df['close']
     high = df['high']
     low = df['low']
     volume = df['volume']
+    prev_close = g['close'].shift(1)
+    pos = _group_positions(keys.to_numpy())
     
     # ----- 가격 수익률 -----
-    df['return_1d'] = close.pct_change(1)
-    df['return_5d'] = close.pct_change(5)
-    df['return_20d'] = close.pct_change(20)
+    df['return_1d'] = g['close'].pct_change(1)
+    df['return_5d'] = g['close'].pct_change(5)
+    df['return_20d'] = g['close'].pct_change(20)
     
     # ----- 이동평균선 및 이격도 -----
     for w in CFG.ma_windows:
-        ma = close.rolling(window=w, min_periods=1).mean()
+        ma = _rolling(close, keys, w, min_periods=1)
         df[f'ma_{w}'] = ma
         df[f'ma_{w}_ratio'] = (close / ma - 1).astype('float32')
     
     # ----- RSI -----
-    delta = close.diff()
-    gain = delta.where(delta > 0, 0).rolling(window=CFG.rsi_period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=CFG.rsi_period).mean()
+    delta = close - prev_close
+    gain = _rolling_mean_sorted(delta.where(delta > 0, 0), pos, CFG.rsi_period)
+    loss = _rolling_mean_sorted(-delta.where(delta < 0, 0), pos, CFG.rsi_period)
     rs = gain / (loss + 1e-10)
     df['rsi'] = (100 - 100 / (1 + rs)).astype('float32')
     
     # ----- MACD -----
-    ema_fast = close.ewm(span=CFG.macd_fast, adjust=False).mean()
-    ema_slow = close.ewm(span=CFG.macd_slow, adjust=False).mean()
+    ema_fast = _ewm_mean(close, keys, CFG.macd_fast)
+    ema_slow = _ewm_mean(close, keys, CFG.macd_slow)
     df['macd'] = (ema_fast - ema_slow).astype('float32')
-    df['macd_signal'] = df['macd'].ewm(span=CFG.macd_signal, adjust=False).mean().astype('float32')
+    df['macd_signal'] = _ewm_mean(df['macd'], keys, CFG.macd_signal).astype('float32')
     df['macd_hist'] = (df['macd'] - df['macd_signal']).astype('float32')
     
     # ----- Bollinger Bands -----
-    bb_ma = close.rolling(window=CFG.bollinger_period).mean()
-    bb_std = close.rolling(window=CFG.bollinger_period).std()
+    bb_ma = _rolling(close, keys, CFG.bollinger_period)
+    bb_std = _rolling(close, keys, CFG.bollinger_period, how='std')
     bb_upper = bb_ma + 2 * bb_std
     bb_lower = bb_ma - 2 * bb_std
     df['bb_position'] = ((close - bb_lower) / (bb_upper - bb_lower + 1e-10)).astype('float32')
     df['bb_width'] = ((bb_upper - bb_lower) / bb_ma).astype('float32')
     
     # ----- ATR (Average True Range) -----
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    df['atr'] = tr.rolling(window=CFG.atr_period).mean().astype('float32')
+    # fmax: NaN은 무시 (첫 행은 전일 종가가 없으므로 high - low)
+    high_v, low_v, prev_close_v = high.to_numpy(), low.to_numpy(), prev_close.to_numpy()
+    tr = np.fmax.reduce([high_v - low_v, np.abs(high_v - prev_close_v), np.abs(low_v - prev_close_v)])
+    tr = pd.Series(tr, index=df.index)
+    df['atr'] = _rolling_mean_sorted(tr, pos, CFG.atr_period).astype('float32')
     df['atr_ratio'] = (df['atr'] / close).astype('float32')
     
     # ----- 거래량 관련 -----
-    vol_ma5 = volume.rolling(window=5).mean()
-    vol_ma20 = volume.rolling(window=20).mean()
+    vol_ma5 = _rolling(volume, keys, 5)
+    vol_ma20 = _rolling(volume, keys, 20)
     df['volume_ratio_5d'] = (volume / (vol_ma5 + 1)).astype('float32')
     df['volume_ratio_20d'] = (volume / (vol_ma20 + 1)).astype('float32')
     
     # OBV (On-Balance Volume)
-    obv = (np.sign(close.diff()) * volume).fillna(0).cumsum()
-    df['obv_change'] = obv.pct_change(5).astype('float32')
+    obv = (np.sign(delta) * volume).fillna(0).groupby(keys, sort=False).cumsum()
+    df['obv_change'] = obv.groupby(keys, sort=False).pct_change(5).astype('float32')
     
     # ----- 캔들 패턴 -----
     body = close - df['open']
     candle_range = high - low + 1e-10
     df['body_ratio'] = (body / candle_range).astype('float32')
-    df['upper_shadow'] = ((high - pd.concat([close, df['open']], axis=1).max(axis=1)) / candle_range).astype('float32')
-    df['lower_shadow'] = ((pd.concat([close, df['open']], axis=1).min(axis=1) - low) / candle_range).astype('float32')
+    close_v, open_v = close.to_numpy(), df['open'].to_numpy()
+    df['upper_shadow'] = ((high - np.fmax(close_v, open_v)) / candle_range).astype('float32')
+    df['lower_shadow'] = ((np.fmin(close_v, open_v) - low) / candle_range).astype('float32')
     
     # ----- 가격 위치 -----
-    high_52w = high.rolling(window=252, min_periods=60).max()
-    low_52w = low.rolling(window=252, min_periods=60).min()
+    high_52w = _rolling(high, keys, 252, how='max', min_periods=60)
+    low_52w = _rolling(low, keys, 252, how='min', min_periods=60)
     df['price_position_52w'] = ((close - low_52w) / (high_52w - low_52w + 1e-10)).astype('float32')
     
     # ----- 변동성 -----
-    df['volatility_20d'] = close.pct_change().rolling(window=20).std().astype('float32')
+    df['volatility_20d'] = _rolling(df['return_1d'], keys, 20, how='std').astype('float32')
     
     return df
 
 
+def compute_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    종목별로 기술적 지표 계산
+    입력: 단일 종목의 시계열 데이터 (date 정렬됨)
+    """
+    return compute_indicators_panel(df)
+
+
 def create_target(df: pd.DataFrame) -> pd.DataFrame:
     """
     타겟 변수 생성:
@@ -153,9 +214,9 @@ def create_target(df: pd.DataFrame) -> pd.DataFrame:
     
     # model4: 5거래일 내 15% 이상 상승 (t+1 ~ t+5 종가 기준)
     # shift(-5).rolling(5).max()는 t+1, t+2, t+3, t+4, t+5 중 최댓값을 가져옴
-    df['max_ret_5d'] = df.groupby('code')['close'].transform(
-        lambda x: x.shift(-5).rolling(window=5).max() / x - 1
-    )
+    # (종목별 lambda transform 대신 groupby shift/rolling을 패널 전체에 한 번씩)
+    future_close = df.groupby('code', sort=False)['close'].shift(-5)
+    df['max_ret_5d'] = _rolling(future_close, df['code'], 5, how='max') / df['close'] - 1
     df['target_5d_15p'] = (df['max_ret_5d'] >= 0.15).astype(int)
 
     # 다중 클래스 레이블 생성 (model1)
@@ -169,57 +230,28 @@ def create_target(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def process_single_stock(args) -> Optional[pd.DataFrame]:
-    """
-    단일 종목 처리 (병렬 처리용)
-    """
-    code, group = args
-    try:
-        group = group.sort_values('date').reset_index(drop=True)
-        if len(group) < 60:  # 최소 60일 데이터 필요
-            return None
-        result = compute_technical_indicators(group)
-        return result
-    except Exception as e:
-        return None
-
-
-def build_features(df: pd.DataFrame, parallel: bool = True) -> pd.DataFrame:
+def build_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     전체 데이터에 대해 피처 엔지니어링 수행
     """
     print("[INFO] Computing technical indicators...")
     
-    groups = list(df.groupby('code'))
-    results = []
-    
-    if parallel:
-        # 병렬 처리
-        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
-            futures = {executor.submit(process_single_stock, g): g[0] for g in groups}
-            for future in tqdm(as_completed(futures), total=len(futures), desc="Processing stocks"):
-                result = future.result()
-                if result is not None:
-                    results.append(result)
-    else:
-        # 순차 처리
-        for g in tqdm(groups, desc="Processing stocks"):
-            result = process_single_stock(g)
-            if result is not None:
-                results.append(result)
-    
-    if not results:
+    # 최소 60일 데이터가 있는 종목만, 종목/날짜 순으로 정렬해 패널 전체를 한 번에 계산
+    counts = df.groupby('code')['code'].transform('size')
+    df = df[counts >= 60].sort_values(['code', 'date']).reset_index(drop=True)
+    if df.empty:
         raise ValueError("No valid data after feature engineering")
     
-    final_df = pd.concat(results, ignore_index=True)
+    final_df = compute_indicators_panel(df)
     
     # 타겟 생성
     print("[INFO] Creating target variable...")
     final_df = create_target(final_df)
     
-    # NaN 제거
+    # NaN 제거 (컬럼별 isna 대신 ndarray 한 번에 마스크 계산; dropna와 같이 inf는 유지)
     feature_cols = get_feature_columns()
-    final_df = final_df.dropna(subset=feature_cols + ['target'])
+    values = final_df[feature_cols + ['target']].to_numpy(dtype=np.float64)
+    final_df = final_df[~np.isnan(values).any(axis=1)]
     
     print(f"[INFO] Final dataset: {len(final_df):,} rows")
     return final_df
@@ -246,9 +278,14 @@ def get_feature_columns() -> list:
     return features
 
 
-def prepare_train_test_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
+def prepare_train_test_data(
+    columns: Optional[list] = None,
+    include_train: bool = True,
+) -> Tuple[Optional[pd.DataFrame], pd.DataFrame]:
     """
     학습/테스트 데이터 준비 (캐싱 지원)
+    - columns: 필요한 컬럼만 로드 (캐시 parquet에서 column pruning)
+    - include_train=False: 학습 데이터는 읽지 않고 None 반환 (백테스트 등 테스트 구간만 필요할 때)
     """
     os.makedirs(CFG.feature_dir, exist_ok=True)
     
@@ -258,8 +295,8 @@ def prepare_train_test_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
     # 캐시 확인
     if os.path.exists(train_cache) and os.path.exists(test_cache):
         print("[INFO] Loading cached features...")
-        train_df = pd.read_parquet(train_cache)
-        test_df = pd.read_parquet(test_cache)
+        train_df = pd.read_parquet(train_cache, columns=columns) if include_train else None
+        test_df = pd.read_parquet(test_cache, columns=columns)
         return train_df, test_df
     
     # 전체 데이터 로드 (2000 ~ 2026)
@@ -267,19 +304,23 @@ def prepare_train_test_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
     all_data = load_all_bars(CFG.train_start, CFG.test_end)
     
     # 피처 엔지니어링
-    all_data = build_features(all_data, parallel=True)
+    all_data = build_features(all_data)
     
     # 날짜로 분할
     all_data['date_str'] = all_data['date'].dt.strftime('%Y-%m-%d')
     train_df = all_data[all_data['date_str'] <= CFG.train_end].copy()
     test_df = all_data[all_data['date_str'] >= CFG.test_start].copy()
     
-    # 캐시 저장
-    train_df.to_parquet(train_cache, index=False)
-    test_df.to_parquet(test_cache, index=False)
+    # 캐시 저장 (zstd 압축)
+    train_df.to_parquet(train_cache, index=False, compression='zstd')
+    test_df.to_parquet(test_cache, index=False, compression='zstd')
     
     print(f"[INFO] Train: {len(train_df):,} rows, Test: {len(test_df):,} rows")
     
+    if columns is not None:
+        train_df, test_df = train_df[columns], test_df[columns]
+    if not include_train:
+        train_df = None
     return train_df, test_df
 
 
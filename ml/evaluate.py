@@ -15,6 +15,10 @@ from tqdm import tqdm
 from ml.config import CFG
 from ml.data_pipeline import prepare_train_test_data, get_feature_columns
 
+# 클래스별 대표 수익률 (구간 중간값)
+# 클래스: 0(<2%), 1(2-5%), 2(5-8%), 3(8-12%), 4(12-19%), 5(19-29%), 6(>=29%)
+_CLASS_RETURNS = np.array([0.0, 0.035, 0.065, 0.10, 0.155, 0.24, 0.35])
+
 
 def load_latest_model() -> Tuple[CatBoostClassifier, str]:
     """
@@ -39,13 +43,11 @@ def predict_with_probability(model: CatBoostClassifier, X: np.ndarray) -> Tuple[
     # 각 클래스별 확률
     proba = model.predict_proba(X)
     
-    # 클래스 1 이상(2% 이상 상승)의 확률 합
-    positive_proba = proba[:, CFG.min_positive_class:].sum(axis=1)
+    # 클래스 1 이상(2% 이상 상승)의 확률 합 = 1 - 하위 클래스 확률 합 (합산할 컬럼이 더 적음)
+    positive_proba = 1.0 - proba[:, :CFG.min_positive_class].sum(axis=1)
     
-    # 가중치를 적용한 기대 수익률 (클래스별 중간값 * 확률)
-    # 클래스: 0(<2%), 1(2-5%), 2(5-8%), 3(8-12%), 4(12-19%), 5(19-29%), 6(>=29%)
-    class_returns = np.array([0.0, 0.035, 0.065, 0.10, 0.155, 0.24, 0.35])
-    expected_return = (proba * class_returns).sum(axis=1)
+    # 가중치를 적용한 기대 수익률 (클래스별 중간값 * 확률, (N,7) 임시 배열 없이 행렬-벡터 곱)
+    expected_return = proba @ _CLASS_RETURNS
     
     return positive_proba, expected_return
 
@@ -62,31 +64,35 @@ def backtest_topk(
     """
     feature_cols = get_feature_columns()
     
-    # 날짜별로 그룹화
-    test_df = test_df.copy()
-    test_df['date_str'] = test_df['date'].dt.strftime('%Y-%m-%d')
-    
-    dates = sorted(test_df['date_str'].unique())
+    # 날짜순으로 한 번 정렬한 뒤 groupby로 날짜별 연속 구간을 순회 (매일 전체 프레임을 비교하지 않음)
+    test_df = test_df.sort_values('date', kind='stable').reset_index(drop=True)
+    day_sizes = test_df.groupby('date', sort=True).size()
+    day_offsets = np.concatenate(([0], np.cumsum(day_sizes.to_numpy())))
     
     results = []
+    if test_df.empty:
+        return pd.DataFrame(results)
     
     print(f"\n[INFO] Backtesting Top-{top_k} strategy...")
     
-    for i, date in enumerate(tqdm(dates[:-1], desc="Backtesting")):  # 마지막 날 제외 (다음날 없음)
-        day_data = test_df[test_df['date_str'] == date].copy()
+    # 전체 기간을 한 번에 예측 (CatBoost는 float32 F-order 입력에 최적화), 날짜별로는 구간만 잘라 씀
+    X_all = np.asfortranarray(test_df[feature_cols].to_numpy(dtype=np.float32))
+    positive_proba_all, expected_return_all = predict_with_probability(model, X_all)
+    next_returns = test_df['next_return'].to_numpy()
+    codes = test_df['code'].to_numpy()
+    
+    for i, date in enumerate(tqdm(day_sizes.index[:-1], desc="Backtesting")):  # 마지막 날 제외 (다음날 없음)
+        date = date.strftime('%Y-%m-%d')
+        lo, hi = day_offsets[i], day_offsets[i + 1]
         
-        if len(day_data) < top_k:
+        if hi - lo < top_k:
             continue
         
-        # 예측
-        X = day_data[feature_cols].values
-        positive_proba, expected_return = predict_with_probability(model, X)
-        
-        day_data['positive_proba'] = positive_proba
-        day_data['expected_return'] = expected_return
+        positive_proba = positive_proba_all[lo:hi]
+        expected_return = expected_return_all[lo:hi]
         
         # 확률 임계값 이상인 종목만 필터
-        candidates = day_data[day_data['positive_proba'] >= min_prob_threshold]
+        candidates = np.flatnonzero(positive_proba >= min_prob_threshold)
         
         if len(candidates) < 1:
             # 임계값 충족 종목이 없으면 스킵
@@ -98,11 +104,14 @@ def backtest_topk(
             })
             continue
         
-        # 기대 수익률 기준 상위 K개 선택
-        top_stocks = candidates.nlargest(min(top_k, len(candidates)), 'expected_return')
+        # 기대 수익률 기준 상위 K개 선택 (argpartition: 전체 정렬 없이 O(N), 선택된 K개만 내림차순 정렬)
+        exret = expected_return[candidates]
+        k = min(top_k, exret.size)
+        idx = np.argpartition(exret, -k)[-k:]
+        idx = candidates[idx[np.argsort(-exret[idx], kind='stable')]]
         
         # 실제 다음날 수익률 계산 (next_return은 이미 계산되어 있음)
-        actual_returns = top_stocks['next_return'].values
+        actual_returns = next_returns[lo:hi][idx]
         valid_returns = actual_returns[~np.isnan(actual_returns)]
         
         if len(valid_returns) == 0:
@@ -115,10 +124,10 @@ def backtest_topk(
             'date': date,
             'n_selected': len(valid_returns),
             'portfolio_return': portfolio_return,
-            'avg_prob': top_stocks['positive_proba'].mean(),
-            'avg_expected_return': top_stocks['expected_return'].mean(),
+            'avg_prob': positive_proba[idx].mean(),
+            'avg_expected_return': expected_return[idx].mean(),
             'hit_rate': (valid_returns >= 0.02).mean(),  # 2% 이상 상승 적중률
-            'selected_codes': top_stocks['code'].tolist()
+            'selected_codes': codes[lo:hi][idx].tolist()
         })
     
     return pd.DataFrame(results)
@@ -253,7 +262,7 @@ def main():
     print("=" * 60)
     
     # 데이터 및 모델 로드
-    _, test_df = prepare_train_test_data()
+    _, test_df = prepare_train_test_data(include_train=False)
     model, model_path = load_latest_model()
     
     # 평가 대상 Top-K 리스트 결정
@@ -76,10 +76,12 @@ def _predict(model: CatBoostClassifier, feature_names: List[str], df: pd.DataFra
         if col not in df.columns:
             df[col] = 0
 
-    X = df[feature_names]
-    if X.empty:
+    if df.empty:
         return np.zeros((len(df),), dtype=np.int64), np.zeros((len(df),), dtype=np.float32)
 
+    # CatBoost는 float32 F-order 입력에 최적화
+    X = np.asfortranarray(df[feature_names].to_numpy(dtype=np.float32))
+
     probs = model.predict_proba(X)
     if probs.ndim == 2:
         pred_class = probs.argmax(axis=1).astype(np.int64)
@@ -101,7 +103,13 @@ def evaluate_2025(start_date: str = "2025-01-01", end_date: str = "2025-12-31")
     model, feature_names, model_path = _load_latest_model()
     print(f"[INFO] Model: {model_path}")
 
-    dates = sorted(df[(df["date"] >= start_date) & (df["date"] <= end_date)]["date"].unique())
+    # 기간 내 행을 날짜순으로 한 번 정렬해 날짜별 구간으로 나눠 둠 (매일 전체 프레임을 비교하지 않음)
+    df = df[(df["date"] >= start_date) & (df["date"] <= end_date)].sort_values("date", kind="stable")
+
+    # 기간 전체를 한 번에 예측 (행별 예측은 서로 독립이므로 날짜별 호출과 결과 동일)
+    df["pred_class"], df["prob_up"] = _predict(model, feature_names, df)
+    day_groups = dict(tuple(df.groupby("date", sort=True)))
+    dates = list(day_groups)
     if len(dates) < 2:
         raise ValueError("Not enough dates")
 
@@ -122,8 +130,8 @@ def evaluate_2025(start_date: str = "2025-01-01", end_date: str = "2025-12-31")
         today = dates[i]
         next_day = dates[i + 1]
 
-        day = df[df["date"] == today].copy()
-        nxt = df[df["date"] == next_day][["code", "close"]].copy()
+        day = day_groups[today].copy()
+        nxt = day_groups[next_day][["code", "close"]]
         if day.empty or nxt.empty:
             continue
 
@@ -132,10 +140,6 @@ def evaluate_2025(start_date: str = "2025-01-01", end_date: str = "2025-12-31")
         if day.empty:
             continue
 
-        pred_class, prob_up = _predict(model, feature_names, day)
-        day["pred_class"] = pred_class
-        day["prob_up"] = prob_up
-
         # realized next-day return
         day["next_close"] = day["code"].map(next_close)
         day = day[(day["close"] > 0) & (day["next_close"] > 0)]
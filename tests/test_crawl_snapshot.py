@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""crawl.py KRX 스냅샷 수집 회귀 테스트 (python -m unittest discover tests)"""
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawl
+
+
+def _fake_pykrx(snap: pd.DataFrame):
+    stock = types.SimpleNamespace(get_market_ohlcv_by_ticker=lambda *args, **kwargs: snap)
+    return types.SimpleNamespace(stock=stock)
+
+
+class FetchBarsSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.df_krx = pd.DataFrame({"Code": ["005930", "000660"], "Name": ["삼성전자", "SK하이닉스"]})
+
+    def test_suspended_stock_prices_filled_with_close(self):
+        # 거래정지 종목: pykrx는 종가만 채우고 시/고/저가, 거래량은 0
+        snap = pd.DataFrame(
+            {
+                "시가": [0, 100], "고가": [0, 110], "저가": [0, 90], "종가": [500, 105],
+                "거래량": [0, 1000], "등락률": [0.0, 5.0],
+            },
+            index=pd.Index(["005930", "000660"], name="티커"),
+        )
+        with mock.patch.dict(sys.modules, {"pykrx": _fake_pykrx(snap)}), \
+                mock.patch.object(crawl._rate_limiter, "acquire"):
+            out = crawl._fetch_bars_snapshot("2025-01-02", self.df_krx)
+
+        row = out.set_index("code").loc["005930"]
+        self.assertEqual((row["open"], row["high"], row["low"], row["close"]), (500, 500, 500, 500))
+        self.assertEqual(row["volume"], 0)  # get_suspended_codes가 계속 잡을 수 있도록 유지
+
+        row = out.set_index("code").loc["000660"]
+        self.assertEqual((row["open"], row["high"], row["low"], row["close"]), (100, 110, 90, 105))
+
+
+class CollectSnapshotsTest(unittest.TestCase):
+    def setUp(self):
+        self.df_krx = pd.DataFrame({"Code": ["005930"], "Name": ["삼성전자"]})
+        self.snap = pd.DataFrame(
+            {"시가": [100], "고가": [110], "저가": [90], "종가": [105], "거래량": [1000], "등락률": [5.0]},
+            index=pd.Index(["005930"], name="티커"),
+        )
+
+    def _collect(self, fetch, dates):
+        stock = types.SimpleNamespace(get_market_ohlcv_by_ticker=fetch)
+        with mock.patch.dict(sys.modules, {"pykrx": types.SimpleNamespace(stock=stock)}), \
+                mock.patch.object(crawl._rate_limiter, "acquire"), \
+                mock.patch.object(crawl.time, "sleep"), \
+                mock.patch.object(crawl, "_save_bars_partition", side_effect=lambda d, *a: f"{d}.parquet"):
+            return crawl._collect_snapshots(dates, self.df_krx, merge_existing=False)
+
+    def test_transient_error_is_retried(self):
+        calls = []
+
+        def fetch(date, market):
+            calls.append(date)
+            if len(calls) == 1:
+                raise ConnectionError("Read timed out")
+            return self.snap
+
+        saved, fallback = self._collect(fetch, ["2025-01-02"])
+        self.assertEqual(saved, {"2025-01-02": "2025-01-02.parquet"})
+        self.assertEqual(fallback, [])
+
+    def test_single_failing_date_does_not_disable_snapshots(self):
+        def fetch(date, market):
+            if date == "20250102":
+                raise ConnectionError("connection reset")
+            return self.snap
+
+        dates = ["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07"]
+        saved, fallback = self._collect(fetch, dates)
+        self.assertEqual(fallback, ["2025-01-02"])
+        self.assertEqual(sorted(saved), dates[1:])
+
+    def test_permanent_error_disables_snapshots(self):
+        def fetch(date, market):
+            raise KeyError("로그인 실패")
+
+        dates = ["2025-01-02", "2025-01-03"]
+        saved, fallback = self._collect(fetch, dates)
+        self.assertEqual(saved, {})
+        self.assertEqual(fallback, dates)
+
+
+if __name__ == "__main__":
+    unittest.main()
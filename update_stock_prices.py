@@ -4223,12 +4223,9 @@ def api_auto_trading_start_with_predictions():
         # 기존 WATCHING/IDLE 상태의 포지션 제거
         from auto_trading_strategy1 import Position, PositionState, UniverseStock
         
-        positions_to_keep = {k: v for k, v in engine.state.positions.items() 
-                            if v.state in (PositionState.ENTERED, PositionState.EXIT_PENDING)}
-        engine.state.positions = positions_to_keep
-        
         # 새 유니버스 생성
         universe = []
+        watch_positions = []
         now = datetime.now()
         today = now.strftime('%Y-%m-%d')
         
@@ -4251,16 +4248,16 @@ def api_auto_trading_start_with_predictions():
             universe.append(us)
             
             # Position 생성 - WATCHING 상태로
-            if code not in engine.state.positions:
-                pos = Position(
-                    code=code,
-                    name=name,
-                    state=PositionState.WATCHING,
-                    prev_close=prev_close,
-                    market_cap=market_cap
-                )
-                engine.state.positions[code] = pos
+            watch_positions.append(Position(
+                code=code,
+                name=name,
+                state=PositionState.WATCHING,
+                prev_close=prev_close,
+                market_cap=market_cap
+            ))
         
+        # 보유/청산 대기 포지션은 유지하고 새 종목을 WATCHING으로 추가 (엔진 루프와 동시 수정 방지)
+        engine.replace_positions((PositionState.ENTERED, PositionState.EXIT_PENDING), watch_positions)
         engine.state.universe = universe
         
         # 투자금 비율 적용
@@ -4308,17 +4305,11 @@ def api_auto_trading_build_universe():
         from auto_trading_strategy1 import Position, PositionState
         
         # ENTERED, EXIT_PENDING 상태가 아닌 포지션만 제거 (보유중 종목은 유지)
-        positions_to_keep = {k: v for k, v in engine.state.positions.items() 
-                            if v.state in (PositionState.ENTERED, PositionState.EXIT_PENDING)}
-        engine.state.positions = positions_to_keep
-        
-        # 새 유니버스 저장
-        engine.state.universe = universe
-        
         # 새 유니버스 종목을 positions에 추가
-        for stock in universe:
-            if stock.code not in engine.state.positions:
-                engine.state.positions[stock.code] = Position(
+        engine.replace_positions(
+            (PositionState.ENTERED, PositionState.EXIT_PENDING),
+            [
+                Position(
                     code=stock.code,
                     name=stock.name,
                     state=PositionState.WATCHING,
@@ -4326,6 +4317,12 @@ def api_auto_trading_build_universe():
                     prev_high=getattr(stock, 'prev_high', 0),
                     market_cap=stock.market_cap
                 )
+                for stock in universe
+            ]
+        )
+        
+        # 새 유니버스 저장
+        engine.state.universe = universe
         
         engine._save_state()
         
@@ -4457,7 +4454,7 @@ def api_auto_trading_logs():
         limit = int(request.args.get('limit', 100))
         engine = get_auto_trading_engine()
         
-        logs = engine.state.logs[-limit:]
+        logs = list(engine.state.logs)[-limit:]
         
         return jsonify({
             "success": True,
@@ -4624,15 +4621,14 @@ def api_add_target_stocks():
                 engine.state.universe.append(universe_stock)
                 added_count += 1
             
-            # 3. Position 초기화 (WATCHING 상태로)
-            if code not in engine.state.positions:
-                engine.state.positions[code] = Position(
-                    code=code,
-                    name=name,
-                    state=PositionState.WATCHING,
-                    prev_close=base_price,
-                    market_cap=market_cap
-                )
+            # 3. Position 초기화 (WATCHING 상태로, 이미 있으면 유지)
+            engine.add_watch_position(Position(
+                code=code,
+                name=name,
+                state=PositionState.WATCHING,
+                prev_close=base_price,
+                market_cap=market_cap
+            ))
         
         db.session.commit()
         engine._save_state()
@@ -4676,10 +4672,9 @@ def api_delete_target_stocks():
             engine.state.universe = [u for u in engine.state.universe if u.code != code]
             
             # 3. Position에서 제거 (보유 중이 아닌 경우만)
-            if code in engine.state.positions:
-                pos = engine.state.positions[code]
-                if pos.state not in [PositionState.ENTERED, PositionState.ENTRY_PENDING, PositionState.EXIT_PENDING]:
-                    del engine.state.positions[code]
+            engine.remove_positions(
+                [code], (PositionState.ENTERED, PositionState.ENTRY_PENDING, PositionState.EXIT_PENDING)
+            )
             
             deleted_count += 1
         
@@ -4712,11 +4707,7 @@ def api_clear_target_stocks():
         engine.state.universe = []
         
         # 3. 보유 중이 아닌 Position 제거
-        positions_to_keep = {}
-        for code, pos in engine.state.positions.items():
-            if pos.state in [PositionState.ENTERED, PositionState.ENTRY_PENDING, PositionState.EXIT_PENDING]:
-                positions_to_keep[code] = pos
-        engine.state.positions = positions_to_keep
+        engine.replace_positions((PositionState.ENTERED, PositionState.ENTRY_PENDING, PositionState.EXIT_PENDING))
         
         db.session.commit()
         engine._save_state()
@@ -4736,21 +4727,17 @@ def api_clear_target_stocks():
 def api_auto_trading_remove_positions():
     """선택한 종목들을 포지션 목록에서 제거"""
     try:
+        from auto_trading_strategy1 import PositionState
+        
         data = request.get_json()
         codes = data.get('codes', [])
         if not codes:
             return jsonify({"success": False, "error": "codes required"}), 400
         
         engine = get_auto_trading_engine()
-        removed_count = 0
-        for code in codes:
-            if code in engine.state.positions:
-                pos = engine.state.positions[code]
-                # 보유 중(ENTERED) 또는 매수 대기(ENTRY_PENDING)만 삭제 불가
-                # EXIT_PENDING은 오류로 인해 실제로는 청산 완료된 경우가 있으므로 삭제 허용
-                if pos.state not in ['ENTERED', 'ENTRY_PENDING']:
-                    del engine.state.positions[code]
-                    removed_count += 1
+        # 보유 중(ENTERED) 또는 매수 대기(ENTRY_PENDING)만 삭제 불가
+        # EXIT_PENDING은 오류로 인해 실제로는 청산 완료된 경우가 있으므로 삭제 허용
+        removed_count = engine.remove_positions(codes, (PositionState.ENTERED, PositionState.ENTRY_PENDING))
         
         return jsonify({"success": True, "removed": removed_count})
     except Exception as e:
@@ -4762,18 +4749,14 @@ def api_auto_trading_remove_positions():
 def api_auto_trading_clear_positions():
     """보유 중이 아닌 모든 종목을 포지션 목록에서 제거"""
     try:
-        engine = get_auto_trading_engine()
-        to_remove = []
-        for code, pos in engine.state.positions.items():
-            # 보유 중(ENTERED) 또는 매수 대기(ENTRY_PENDING)만 삭제 불가
-            # EXIT_PENDING은 오류로 인해 실제로는 청산 완료된 경우가 있으므로 삭제 허용
-            if pos.state not in ['ENTERED', 'ENTRY_PENDING']:
-                to_remove.append(code)
+        from auto_trading_strategy1 import PositionState
         
-        for code in to_remove:
-            del engine.state.positions[code]
+        engine = get_auto_trading_engine()
+        # 보유 중(ENTERED) 또는 매수 대기(ENTRY_PENDING)만 삭제 불가
+        # EXIT_PENDING은 오류로 인해 실제로는 청산 완료된 경우가 있으므로 삭제 허용
+        removed_count = engine.remove_positions(None, (PositionState.ENTERED, PositionState.ENTRY_PENDING))
         
-        return jsonify({"success": True, "removed": len(to_remove)})
+        return jsonify({"success": True, "removed": removed_count})
     except Exception as e:
         print(f"포지션 전체 삭제 오류: {e}")
         return jsonify({"success": False, "error": str(e)}), 500